@@ -0,0 +1,36 @@
+"""Filesystem broker transport of the benchmarks.
+ The kombu filesystem transport creates the file of a message before writing it, so a
+ consumer polling the folder meanwhile may read an empty message. This transport writes
+ every message to a temporary file renamed once complete, which is atomic.
+
+Usage: broker_url = "benchmarks.filesystem_broker.Transport+filesystem://"
+"""
+
+import os
+import tempfile
+import uuid
+from time import monotonic
+
+from kombu.exceptions import ChannelError
+from kombu.transport import filesystem
+from kombu.utils.encoding import str_to_bytes
+from kombu.utils.json import dumps
+
+
+class Channel(filesystem.Channel):
+    """Filesystem channel writing its messages atomically"""
+
+    def _put(self, queue, payload, **kwargs):
+        filename = f"{int(round(monotonic() * 1000))}_{uuid.uuid4()}.{queue}.msg"
+        try:
+            # The temporary name does not end with .msg, consumers skip it
+            fd, tmp_path = tempfile.mkstemp(dir=self.data_folder_out, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(str_to_bytes(dumps(payload)))
+            os.replace(tmp_path, os.path.join(self.data_folder_out, filename))
+        except OSError:
+            raise ChannelError(f"Cannot add file {filename!r} to directory")
+
+
+class Transport(filesystem.Transport):
+    Channel = Channel
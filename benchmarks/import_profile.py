@@ -0,0 +1,135 @@
+"""Import-time profile of the simulator api processes.
+ Imports the modules loaded at startup by the web server, the celery worker and the celery
+ commands (e.g. the health check) in fresh interpreters run with `-X importtime`, and
+ reports their startup time, the slowest packages and the memory of the process.
+ Modules imported with importlib are not logged by `-X importtime`, so the loaded modules
+ are read from sys.modules at the end of the startup.
+
+Usage:
+    python benchmarks/import_profile.py --top 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run by each process at startup. The web server is warmed up as by gunicorn, with the
+# in-memory broker, so only the client of the production broker is imported without connecting
+TARGETS = {
+    'api': (
+        "import kombu.transport.pyamqp\n"
+        "import simulator_api.entrypoint\n"
+        "from simulator_api.rest_server.exposed_methods import warm_up\n"
+        "warm_up(timeout=0)"
+    ),
+    'worker': (
+        "from simulator_api.celery_tasks.tasks import preload_modules\n" "preload_modules()"
+    ),
+    'celery-command': "import simulator_api.celery_tasks.tasks",
+}
+# Modules whose import is reported, as they are only needed by some processes
+HEAVY_MODULES = (
+    "sqlalchemy",
+    "celery.backends.database",
+    "simulator_api.transport.publisher",
+    "simulator_api.transport.subscriber",
+)
+START = "import time\nstart = time.perf_counter()"
+REPORT = (
+    "import json, resource, sys\n"
+    "print(json.dumps({'startup_ms': (time.perf_counter() - start) * 1000, "
+    "'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "
+    "'modules': sorted(sys.modules)}))"
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--top", type=int, default=10, help="number of packages reported")
+    parser.add_argument("--json", help="file receiving the results in json")
+    return parser.parse_args(argv)
+
+
+def parse_importtime(stderr):
+    """Parses the `-X importtime` output into (module, self us, cumulative us) tuples."""
+
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        imports.append((module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def profile(code):
+    """Imports the modules of a process in a fresh interpreter and profiles the imports."""
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, env.get('PYTHONPATH')]))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Databases and broker opened by the warm-up of the web server
+        env.update(
+            SIMULATOR_API_CELERY_BROKER_URL="memory://",
+            SIMULATOR_API_CELERY_RESULT_BACKEND=f"db+sqlite:///{tmp_dir}/results.sqlite3",
+            SIMULATOR_API_CELERY_REGISTRY_PATH=f"{tmp_dir}/celery_tasks.sqlite3",
+        )
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"{START}\n{code}\n{REPORT}"],
+            cwd=ROOT_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    imports = parse_importtime(process.stderr)
+    report = json.loads(process.stdout.splitlines()[-1])
+
+    packages = defaultdict(int)
+    for module, self_us, _ in imports:
+        packages[module.split(".")[0]] += self_us
+    modules = set(report['modules'])
+    return {
+        'startup_ms': report['startup_ms'],
+        'import_ms': sum(self_us for _, self_us, _ in imports) / 1000,
+        'modules': len(modules),
+        'max_rss_mb': report['max_rss_kb'] / 1024,
+        'packages_ms': {
+            package: self_us / 1000
+            for package, self_us in sorted(packages.items(), key=lambda item: -item[1])
+        },
+        'heavy_modules': {module: module in modules for module in HEAVY_MODULES},
+    }
+
+
+def print_profile(target, result, top):
+    print(
+        f"{target}: startup {result['startup_ms']:.1f} ms "
+        f"(imports logged {result['import_ms']:.1f} ms), {result['modules']} modules, "
+        f"max RSS {result['max_rss_mb']:.1f} MB"
+    )
+    for package, duration in list(result['packages_ms'].items())[:top]:
+        print(f"    {package:<40}{duration:>10.1f} ms")
+    loaded = [module for module, imported in result['heavy_modules'].items() if imported]
+    print(f"    loaded: {', '.join(loaded) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {target: profile(TARGETS[target]) for target in args.targets}
+    for target, result in results.items():
+        print_profile(target, result, args.top)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
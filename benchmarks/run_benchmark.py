@@ -0,0 +1,399 @@
+"""End-to-end benchmark of the simulator api.
+ Starts the web server and a celery worker on a filesystem broker, with the fake-ign
+ stand-in of the Ignition CLI, then drives the endpoints at a given concurrency and reports
+ the latency percentiles and throughput of every request.
+
+Usage:
+    python benchmarks/run_benchmark.py --concurrency 16 --duration 20 --latency 0.05
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_IGN = os.path.join(ROOT_DIR, "benchmarks", "fake-ign")
+
+SCENARIOS = (
+    "topic-publish",
+    "topic-echo",
+    "topic-echo-batch",
+    "topic-publish-bulk",
+    "communication-test",
+    "task-status",
+)
+# Statuses of the answers of a complete task
+FINAL_STATUSES = ("SUCCESS", "ERROR", "TIMEOUT", "Celery Task failed")
+# Filesystem broker shared by the benchmarked processes, see filesystem_broker.py
+BROKER_URL = "benchmarks.filesystem_broker.Transport+filesystem://"
+MSGTYPE = "ignition.msgs.StringMsg"
+STARTUP_TIMEOUT = 60
+# Queues of simulator_api.celery_tasks.queues, each consumed by its own worker
+QUEUES = ("probes", "echoes", "batches")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), metavar="SCENARIO"
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds of every ign command")
+    parser.add_argument("--output-size", type=int, default=64, help="bytes of every echo")
+    parser.add_argument("--failure-rate", type=float, default=0, help="fraction of failing ign")
+    parser.add_argument("--topics", type=int, default=16, help="distinct topics echoed")
+    parser.add_argument("--batch-size", type=int, default=8, help="topics of an echo batch")
+    parser.add_argument("--bulk-size", type=int, default=100, help="messages of a bulk publish")
+    parser.add_argument(
+        "--worker-concurrency", type=int, help="processes of every celery worker (default: config)"
+    )
+    parser.add_argument(
+        "--server",
+        choices=("gunicorn", "flask"),
+        default="gunicorn" if shutil.which("gunicorn") else "flask",
+        help="web server running the flask app (default: gunicorn when installed)",
+    )
+    parser.add_argument(
+        "--worker-class",
+        choices=("sync", "gthread"),
+        help="gunicorn worker class (default: config)",
+    )
+    parser.add_argument("--workers", type=int, help="gunicorn workers (default: config)")
+    parser.add_argument("--threads", type=int, help="gunicorn threads per worker (default: config)")
+    parser.add_argument("--port", type=int, default=0, help="web server port (default: free)")
+    parser.add_argument("--json", help="file receiving the results in json")
+    return parser.parse_args(argv)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def benchmark_env(args, work_dir):
+    """Environment of the benchmarked processes, isolated in a work directory."""
+
+    bin_dir = os.path.join(work_dir, "bin")
+    broker_dir = os.path.join(work_dir, "broker")
+    metrics_dir = os.path.join(work_dir, "metrics")
+    for path in (bin_dir, broker_dir, metrics_dir):
+        os.makedirs(path)
+    os.symlink(FAKE_IGN, os.path.join(bin_dir, "ign"))
+
+    broker_options = {
+        'data_folder_in': broker_dir,
+        'data_folder_out': broker_dir,
+        'control_folder': os.path.join(work_dir, "control"),
+        'polling_interval': 0.01,
+    }
+    env = dict(os.environ)
+    env.update(
+        {
+            'PATH': f"{bin_dir}{os.pathsep}{env.get('PATH', '')}",
+            'PYTHONPATH': os.pathsep.join(filter(None, [ROOT_DIR, env.get('PYTHONPATH')])),
+            'PROMETHEUS_MULTIPROC_DIR': metrics_dir,
+            'SIMULATOR_API_CELERY_BROKER_URL': BROKER_URL,
+            'SIMULATOR_API_CELERY_BROKER_OPTIONS': json.dumps(broker_options),
+            'SIMULATOR_API_CELERY_RESULT_BACKEND': f"db+sqlite:///{work_dir}/results.sqlite3",
+            'SIMULATOR_API_CELERY_REGISTRY_PATH': f"{work_dir}/celery_tasks.sqlite3",
+            'FAKE_IGN_LATENCY': str(args.latency),
+            'FAKE_IGN_OUTPUT_SIZE': str(args.output_size),
+            'FAKE_IGN_FAILURE_RATE': str(args.failure_rate),
+        }
+    )
+    if args.worker_concurrency is not None:
+        for queue in QUEUES:
+            env[f"SIMULATOR_API_QUEUES_{queue.upper()}_CONCURRENCY"] = str(args.worker_concurrency)
+    for variable in ("worker_class", "workers", "threads"):
+        if getattr(args, variable) is not None:
+            env[f"SIMULATOR_API_SERVER_{variable.upper()}"] = str(getattr(args, variable))
+    return env
+
+
+def start_processes(args, env, port, log):
+    """Starts the celery workers and the web server, returns their processes."""
+
+    # One worker per queue, as in the container
+    workers = []
+    for queue in QUEUES:
+        options = subprocess.run(
+            [sys.executable, "-m", "simulator_api.celery_tasks.queues", queue],
+            cwd=ROOT_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        workers.append(
+            [
+                sys.executable,
+                "-m",
+                "celery",
+                "-A",
+                "simulator_api.celery_tasks.tasks.celery_instance",
+                "worker",
+                *options,
+                "--loglevel=warning",
+            ]
+        )
+    if args.server == "gunicorn":
+        server = [
+            "gunicorn",
+            "-c",
+            "python:simulator_api.rest_server.gunicorn_config",
+            "-b",
+            f"127.0.0.1:{port}",
+            "simulator_api.entrypoint:app",
+        ]
+    else:
+        server = [
+            sys.executable,
+            "-c",
+            f"from simulator_api.entrypoint import main; main(port={port})",
+        ]
+    return [
+        subprocess.Popen(cmd, cwd=ROOT_DIR, env=env, stdout=log, stderr=log, start_new_session=True)
+        for cmd in workers + [server]
+    ]
+
+
+def stop_processes(processes):
+    for process in processes:
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+class Client:
+    """Client of the api recording the latency of every request"""
+
+    def __init__(self, base_url, max_wait=25):
+        self.base_url = base_url
+        self.max_wait = max_wait
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def record(self, label, duration, ok=True):
+        with self._lock:
+            self.samples[label].append(duration)
+            if not ok:
+                self.errors[label] += 1
+
+    def request(self, label, method, path, **kwargs):
+        start = time.monotonic()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        except requests.RequestException:
+            self.record(label, time.monotonic() - start, ok=False)
+            return None
+        self.record(label, time.monotonic() - start, ok=response.ok)
+        return response if response.ok else None
+
+    def run_task(self, endpoint, path, **kwargs):
+        """Starts a task and waits for its completion, returns its id."""
+
+        start = time.monotonic()
+        response = self.request(f"POST {endpoint}", "POST", path, **kwargs)
+        if response is None:
+            return None
+        task_id = response.json()['task_id']
+
+        status = None
+        while status not in FINAL_STATUSES:
+            response = self.request(
+                f"GET {endpoint}/<id>?wait",
+                "GET",
+                f"/api/v1/{endpoint}/{task_id}?wait={self.max_wait}",
+            )
+            if response is None:
+                break
+            status = (response.json() or {}).get('status')
+        self.record(f"{endpoint} task", time.monotonic() - start, ok=status == "SUCCESS")
+        return task_id
+
+
+def scenario_request(client, args, scenario, index):
+    """Runs one iteration of a scenario."""
+
+    topic = f"/benchmark/{index % args.topics}"
+    if scenario == "topic-publish":
+        params = {'topic': topic, 'message': 'data: "benchmark"', 'msgtype': MSGTYPE}
+        return client.run_task(scenario, "/api/v1/topic-publish", params=params)
+    if scenario == "topic-echo":
+        params = {'topic': topic, 'timeout': 5}
+        return client.run_task(scenario, "/api/v1/topic-echo", params=params)
+    if scenario == "topic-echo-batch":
+        topics = [
+            {'topic': f"/benchmark/{(index + i) % args.topics}", 'timeout': 5}
+            for i in range(min(args.batch_size, args.topics))
+        ]
+        return client.run_task(scenario, "/api/v1/topic-echo-batch", json={'topics': topics})
+    if scenario == "topic-publish-bulk":
+        params = {'topic': topic, 'msgtype': MSGTYPE}
+        messages = [f'data: "benchmark {i}"' for i in range(args.bulk_size)]
+        return client.run_task(scenario, "/api/v1/topic-publish-bulk", params=params, json=messages)
+    if scenario == "communication-test":
+        return client.run_task(scenario, "/api/v1/communication-test")
+    # task-status reads the status of the tasks started by the other scenarios
+    start = index % max(len(args.task_ids), 1)
+    ids = ",".join(args.task_ids[start : start + 50]) or "unknown"
+    return client.request("GET task-status", "GET", "/api/v1/task-status", params={'ids': ids})
+
+
+def run_scenario(client, args, scenario):
+    """Drives a scenario with concurrent clients for the configured duration."""
+
+    deadline = time.monotonic() + args.duration
+    counter = iter(range(sys.maxsize))
+    counter_lock = threading.Lock()
+
+    def loop():
+        task_ids = []
+        while time.monotonic() < deadline:
+            with counter_lock:
+                index = next(counter)
+            task_id = scenario_request(client, args, scenario, index)
+            if isinstance(task_id, str):
+                task_ids.append(task_id)
+        return task_ids
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(loop) for _ in range(args.concurrency)]
+        for future in futures:
+            args.task_ids.extend(future.result())
+    return time.monotonic() - start
+
+
+def wait_ready(client, processes, timeout=STARTUP_TIMEOUT):
+    """Waits until the web server is ready and a task it starts is executed by the worker."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(process.poll() is not None for process in processes):
+            raise RuntimeError("A benchmarked process exited during startup")
+        try:
+            if client.session.get(f"{client.base_url}/ready", timeout=1).ok:
+                break
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    params = {'topic': "/benchmark/ready", 'message': 'data: "ready"', 'msgtype': MSGTYPE}
+    if client.run_task("topic-publish", "/api/v1/topic-publish", params=params) is None:
+        raise RuntimeError("The web server did not answer before the startup timeout")
+    # Latency of the first request after startup, to compare with the steady state
+    first_request = client.samples["POST topic-publish"][0]
+    client.samples.clear()
+    client.errors.clear()
+    return first_request
+
+
+def percentile(values, rank):
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, max(int(round(rank / 100 * len(values))) - 1, 0))]
+
+
+def label_scenario(label):
+    """Scenario of a request label, e.g. 'GET topic-echo/<id>?wait' or 'topic-echo task'."""
+
+    if label.endswith(" task"):
+        return label.split(" ")[0]
+    return label.split(" ")[1].split("/")[0]
+
+
+def summarize(client, durations):
+    """Latency percentiles in milliseconds and throughput of every recorded request."""
+
+    results = {}
+    for label, samples in sorted(
+        client.samples.items(), key=lambda item: (label_scenario(item[0]), item[0])
+    ):
+        values = sorted(samples)
+        results[label] = {
+            'count': len(values),
+            'errors': client.errors[label],
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'req_per_s': len(values) / durations[label_scenario(label)],
+        }
+    return results
+
+
+def print_results(results):
+    header = f"{'request':<36}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+    print(f"{header}{'p99 ms':>10}{'req/s':>10}")
+    for label, stats in results.items():
+        print(
+            f"{label:<36}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['req_per_s']:>10.1f}"
+        )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.task_ids = []
+    port = args.port or free_port()
+
+    with tempfile.TemporaryDirectory(prefix="simulator-api-benchmark-") as work_dir:
+        env = benchmark_env(args, work_dir)
+        with open(os.path.join(work_dir, "processes.log"), "w+") as log:
+            processes = start_processes(args, env, port, log)
+            try:
+                client = Client(f"http://127.0.0.1:{port}")
+                first_request = wait_ready(client, processes)
+                durations = {
+                    scenario: run_scenario(client, args, scenario) for scenario in args.scenarios
+                }
+            except Exception:
+                log.seek(0)
+                sys.stderr.write(log.read())
+                raise
+            finally:
+                stop_processes(processes)
+
+    results = summarize(client, durations)
+    print_results(results)
+    print(f"First request after startup: {first_request * 1000:.1f} ms")
+    if args.json:
+        parameters = {key: value for key, value in vars(args).items() if key != "task_ids"}
+        with open(args.json, "w") as fh:
+            json.dump(
+                {
+                    'parameters': parameters,
+                    'first_request_ms': first_request * 1000,
+                    'results': results,
+                },
+                fh,
+                indent=2,
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,5 @@
 #!/bin/bash
 set -eo pipefail
 
-if ping="$(celery -A simulator_api.celery_tasks.tasks.celery_instance inspect ping --json)" && [ "$ping" = '{"celery@simulator": {"ok": "pong"}}' ]; then
-	exit 0
-fi
-
-exit 1
+# Health of the broker and of the worker of every queue, cached by the web server
+curl --fail --silent --max-time 2 --output /dev/null http://localhost:8081/health
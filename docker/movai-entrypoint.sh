@@ -20,6 +20,12 @@ printf "MOV.AI IGN Simulator - %s\n" "$MOVAI_ENV"
 
 export PATH=${MOVAI_HOME}/.local/bin:${PATH}
 
+# Metrics of the processes of a previous run must not be aggregated
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 exec sudo -E /usr/bin/supervisord -c /etc/supervisor/conf.d/supervisord.conf &
 
 # if commands passed
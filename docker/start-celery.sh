@@ -1,9 +1,14 @@
 #!/bin/bash
 
 LOG_LEVEL=${LOG_LEVEL:-info}
+# Queue consumed by the worker: probes, echoes or batches
+QUEUE=${1:-probes}
 
 # Wait for RabbitMQ to start up
 rabbitmqctl wait $RABBITMQ_PID_FILE
 
+# Options of the worker of the queue, from the [queues] configuration
+WORKER_OPTIONS="$(python3 -m simulator_api.celery_tasks.queues "$QUEUE")" || exit 1
+
 # Start Celery worker after RabbitMQ is ready
-su -w IGN_PARTITION -w IGN_IP -w IGN_RELAY -w IGN_CONFIG_PATH -w LD_LIBRARY_PATH - movai -c "celery -A simulator_api.celery_tasks.tasks.celery_instance worker --concurrency=2 --loglevel=$LOG_LEVEL"
+su -w IGN_PARTITION -w IGN_IP -w IGN_RELAY -w IGN_CONFIG_PATH -w LD_LIBRARY_PATH -w PROMETHEUS_MULTIPROC_DIR - movai -c "celery -A simulator_api.celery_tasks.tasks.celery_instance worker $WORKER_OPTIONS --loglevel=$LOG_LEVEL"
@@ -12,6 +12,7 @@ requirements = [
     "webservercore==1.1.0.4",
     "celery==5.3.5",
     "SQLAlchemy==2.0.23",
+    "prometheus-client==0.17.1",
 ]
 
 setuptools.setup(
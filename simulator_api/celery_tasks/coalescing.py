@@ -0,0 +1,123 @@
+"""Module that provides the coalescing of identical task requests in the api process.
+ A request identical to one whose task is still running, or completed a moment ago, is
+ answered with the id of this task instead of starting a new one, so that a burst of
+ identical requests costs a single task."""
+
+import threading
+import time
+
+from simulator_api.utils.process import per_process
+
+
+class CompletionEvent(threading.Event):
+    """Event remembering when it was set"""
+
+    completed_at = None
+
+    def set(self):
+        self.completed_at = time.monotonic()
+        super().set()
+
+
+class CoalescedTask:
+    """Task shared by identical requests"""
+
+    def __init__(self, max_duration):
+        self.task = None
+        self.max_duration = max_duration
+        self.deadline = None
+        self.started = threading.Event()
+        self.completed = CompletionEvent()
+
+    def start(self, task):
+        """Publishes the started task to the identical requests waiting for it."""
+        self.task = task
+        self.deadline = time.monotonic() + self.max_duration
+        self.started.set()
+
+    def reusable(self, now, freshness):
+        """Whether the task is starting, running, or completed less than freshness seconds ago."""
+        if not self.started.is_set():
+            return True
+        if self.completed.is_set():
+            return now - self.completed.completed_at <= freshness
+        # Bounds the reuse of tasks whose completion notification was missed
+        return now < self.deadline
+
+
+class TaskCoalescer:
+    """Single-flight registry of the tasks started for each request key"""
+
+    def __init__(self, listener):
+        self.listener = listener
+        self.started = 0
+        self.coalesced = 0
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, start, max_duration, freshness=0):
+        """Returns the task of an identical request if reusable, otherwise starts a new one.
+
+        Args:
+            key (tuple): Key of the request, identical requests have the same key
+            start (callable): Starts the task of the request and returns its AsyncResult
+            max_duration (float): Seconds after which a running task is not reused
+            freshness (float, optional): Seconds during which a completed task is reused.
+              Defaults to 0.
+
+        Returns:
+            AsyncResult: Task answering the request
+        """
+
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                self._prune(now, freshness)
+                coalesced = self._tasks.get(key)
+                if coalesced is None:
+                    # Identical requests wait for this placeholder while the task is started
+                    coalesced = self._tasks[key] = CoalescedTask(max_duration)
+                    break
+
+            coalesced.started.wait()
+            if coalesced.task is not None:
+                with self._lock:
+                    self.coalesced += 1
+                return coalesced.task
+            # The start failed, this request may start the task itself
+
+        try:
+            task = start()
+        except BaseException:
+            with self._lock:
+                del self._tasks[key]
+            coalesced.started.set()
+            raise
+
+        self.listener.watch(task.id, coalesced.completed)
+        with self._lock:
+            self.started += 1
+        coalesced.start(task)
+        return task
+
+    def _prune(self, now, freshness):
+        expired = [key for key, task in self._tasks.items() if not task.reusable(now, freshness)]
+        for key in expired:
+            coalesced = self._tasks.pop(key)
+            self.listener.unwatch(coalesced.task.id, coalesced.completed)
+
+
+_coalescer = per_process(TaskCoalescer)
+
+
+def get_coalescer(listener):
+    """Returns the task coalescer of the current process, creating it on first call.
+
+    Args:
+        listener (CompletionListener): Listener of the task completion notifications
+
+    Returns:
+        TaskCoalescer: Task coalescer of the process
+    """
+
+    return _coalescer(listener)
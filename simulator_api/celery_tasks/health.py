@@ -0,0 +1,101 @@
+"""Module that provides the health of the celery workers, as seen by the api process.
+ Every worker publishes a heartbeat with the depth of its queues, and the completion of every
+ task carries the last shell command run by the worker. The api process keeps them in memory,
+ so health checks are answered without starting a process or querying the broker."""
+
+import threading
+import time
+
+import simulator_api.utils.logger as logging
+from simulator_api.celery_tasks.notifications import notify_heartbeat
+from simulator_api.celery_tasks.queues import QUEUES
+
+HEARTBEAT_INTERVAL = 5
+# Workers missing this number of heartbeats are not healthy
+MAX_MISSED_HEARTBEATS = 3
+
+
+class HeartbeatPublisher:
+    """Publishes the heartbeats of a worker from a background thread"""
+
+    def __init__(self, app, hostname, queues, interval=HEARTBEAT_INTERVAL):
+        self.app = app
+        self.hostname = hostname
+        self.queues = queues
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._publish, daemon=True)
+        self._thread.start()
+
+    def queue_depths(self):
+        """Returns the number of messages waiting in each queue consumed by the worker."""
+
+        depths = {}
+        with self.app.pool.acquire(block=True) as conn:
+            for queue in self.queues:
+                depths[queue] = conn.default_channel.queue_declare(
+                    queue=queue, passive=True
+                ).message_count
+        return depths
+
+    def stop(self):
+        """Stops publishing the heartbeats, e.g. when the worker shuts down."""
+
+        self._stopped.set()
+
+    def _publish(self):
+        while not self._stopped.is_set():
+            try:
+                notify_heartbeat(self.app, self.hostname, self.queue_depths())
+            except Exception:
+                logging.exception(f"Failed to publish the heartbeat of {self.hostname}")
+            self._stopped.wait(self.interval)
+
+
+def health_report(listener, max_heartbeat_age=HEARTBEAT_INTERVAL * MAX_MISSED_HEARTBEATS):
+    """Reports the health of the broker and the workers from the state cached by the listener.
+
+    Healthy when the listener is connected to the broker and every queue is consumed by a worker
+    whose last heartbeat is recent. The last shell command is reported, not checked, as it fails
+    while no simulation is running.
+
+    Args:
+        listener (CompletionListener): Listener of the task events of the process
+        max_heartbeat_age (float, optional): Maximum age in seconds of the heartbeat of a
+          healthy worker. Defaults to 3 heartbeat intervals.
+
+    Returns:
+        dict: Health report with keys 'status' ('healthy' or 'unhealthy'), 'broker', 'workers',
+          'queues' and 'last_subprocess'
+    """
+
+    now, now_time = time.monotonic(), time.time()
+    heartbeats, subprocess = listener.health_state()
+
+    workers, queues = {}, dict.fromkeys(QUEUES)
+    for hostname, heartbeat in heartbeats.items():
+        age = now - heartbeat['received']
+        workers[hostname] = {'heartbeat_age': round(age, 3), 'queues': heartbeat['queues']}
+        if age <= max_heartbeat_age:
+            queues.update(heartbeat['queues'])
+
+    connected = listener.ready.is_set()
+    healthy = connected and all(queues[queue] is not None for queue in QUEUES)
+
+    last_subprocess = None
+    if subprocess is not None:
+        success_time = subprocess.get('success_time')
+        last_subprocess = {
+            'status': subprocess['status'],
+            'age': round(now_time - subprocess['time'], 3),
+            'success_age': round(now_time - success_time, 3) if success_time else None,
+        }
+
+    return {
+        'status': "healthy" if healthy else "unhealthy",
+        'broker': "connected" if connected else "disconnected",
+        'workers': workers,
+        # Messages waiting in each queue, None if no healthy worker consumes it
+        'queues': queues,
+        'last_subprocess': last_subprocess,
+    }
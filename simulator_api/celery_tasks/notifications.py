@@ -0,0 +1,216 @@
+"""Module that provides the completion notifications of the celery tasks.
+ Workers publish the final state of every task on a fanout exchange of the broker, and the
+ api process listens to it, so that requests waiting for a task are woken up as soon as its
+ result is stored instead of polling the result backend. The workers also publish their
+ heartbeats on this exchange, kept in memory by the api process to report their health."""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from celery import states
+from kombu import Exchange, Queue
+
+import simulator_api.utils.logger as logging
+from simulator_api.utils.process import per_process
+
+TASK_EVENTS_EXCHANGE = Exchange("simulator_api.task_events", type="fanout", durable=False)
+# Bounds the duration of a publish when the broker is not reachable
+PUBLISH_RETRY_POLICY = {'max_retries': 1, 'interval_start': 0, 'interval_step': 0.5}
+RECONNECT_INTERVAL = 1
+MAX_RECONNECT_INTERVAL = 30
+
+
+def publish_event(app, event):
+    """Publishes an event to the listening api processes.
+
+    Args:
+        app (Celery): Celery application whose broker carries the event
+        event (dict): Json body of the event
+    """
+
+    with app.producer_pool.acquire(block=True) as producer:
+        producer.publish(
+            event,
+            exchange=TASK_EVENTS_EXCHANGE,
+            routing_key='',
+            declare=[TASK_EVENTS_EXCHANGE],
+            serializer='json',
+            retry=True,
+            retry_policy=PUBLISH_RETRY_POLICY,
+        )
+
+
+def notify_completion(app, task_id, state, subprocess=None):
+    """Publishes the final state of a task to the listening api processes.
+
+    Args:
+        app (Celery): Celery application whose broker carries the notification
+        task_id (string): Id of the completed task
+        state (string): Final state of the task
+        subprocess (dict, optional): Status and time of the last shell command run by the
+          process of the task. Defaults to None.
+    """
+
+    event = {'task_id': task_id, 'state': state}
+    if subprocess is not None:
+        event['subprocess'] = subprocess
+    publish_event(app, event)
+
+
+def notify_heartbeat(app, hostname, queues):
+    """Publishes the heartbeat of a worker to the listening api processes.
+
+    Args:
+        app (Celery): Celery application whose broker carries the heartbeat
+        hostname (string): Name of the worker
+        queues (dict): Number of messages waiting in each queue consumed by the worker
+    """
+
+    publish_event(
+        app, {'type': "heartbeat", 'hostname': hostname, 'queues': queues, 'time': time.time()}
+    )
+
+
+class CompletionListener:
+    """Listens to the completion notifications and wakes up the requests waiting for them"""
+
+    def __init__(self, app):
+        self.app = app
+        self.ready = threading.Event()
+        # Last heartbeat of every worker, by hostname
+        self.heartbeats = {}
+        # Last shell command run by a task of the workers
+        self.subprocess = None
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._listen, daemon=True)
+        self._thread.start()
+
+    def watch(self, task_id, event):
+        """Sets an event when the completion of a task is notified, until unwatched.
+
+        Args:
+            task_id (string): Id of the task to watch
+            event (threading.Event): Event set on the completion of the task
+        """
+
+        with self._lock:
+            self._waiters.setdefault(task_id, set()).add(event)
+
+    def unwatch(self, task_id, event):
+        """Stops setting an event on the completion of a task."""
+
+        with self._lock:
+            waiters = self._waiters.get(task_id, set())
+            waiters.discard(event)
+            if not waiters:
+                self._waiters.pop(task_id, None)
+
+    @contextmanager
+    def waiting(self, task_id):
+        """Registers a waiter of a task for the duration of the context.
+
+        Args:
+            task_id (string): Id of the task to wait for
+
+        Yields:
+            threading.Event: Event set when the completion of the task is notified
+        """
+
+        event = threading.Event()
+        self.watch(task_id, event)
+        try:
+            yield event
+        finally:
+            self.unwatch(task_id, event)
+
+    def health_state(self):
+        """Returns the last heartbeat of every worker and the last shell command of a task.
+
+        Returns:
+            heartbeats (dict): 'queues' depths and monotonic 'received' time, by worker hostname
+            subprocess (dict): 'status', 'time' and 'success_time' of the last shell command, None
+              if no task reported one
+        """
+
+        with self._lock:
+            return dict(self.heartbeats), self.subprocess
+
+    def _on_heartbeat(self, body):
+        with self._lock:
+            self.heartbeats[body['hostname']] = {
+                'queues': body.get('queues', {}),
+                'received': time.monotonic(),
+            }
+
+    def _on_message(self, body, message):
+        message.ack()
+        if body.get('type') == "heartbeat":
+            self._on_heartbeat(body)
+            return
+        subprocess = body.get('subprocess')
+        if subprocess is not None:
+            with self._lock:
+                if self.subprocess is None or subprocess['time'] >= self.subprocess['time']:
+                    self.subprocess = subprocess
+        with self._lock:
+            waiters = list(self._waiters.get(body.get('task_id'), ()))
+        for event in waiters:
+            event.set()
+
+    def _listen(self):
+        interval = RECONNECT_INTERVAL
+        while True:
+            try:
+                with self.app.connection_for_read() as conn:
+                    # Each api process has its own queue, deleted when it disconnects
+                    queue = Queue(exchange=TASK_EVENTS_EXCHANGE, exclusive=True, auto_delete=True)
+                    with conn.Consumer(queue, callbacks=[self._on_message], accept=['json']):
+                        self.ready.set()
+                        interval = RECONNECT_INTERVAL
+                        while True:
+                            try:
+                                conn.drain_events(timeout=1)
+                            except socket.timeout:
+                                conn.heartbeat_check()
+            except Exception:
+                logging.exception("Task completion listener disconnected, reconnecting")
+            self.ready.clear()
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_RECONNECT_INTERVAL)
+
+
+def wait_for_completion(listener, task, timeout):
+    """Blocks until a task reaches a final state or the timeout expires.
+
+    Args:
+        listener (CompletionListener): Listener of the completion notifications
+        task (AsyncResult): Task to wait for
+        timeout (float): Maximum number of seconds to wait
+    """
+
+    deadline = time.monotonic() + timeout
+    with listener.waiting(task.id) as completed:
+        # Notifications sent before the queue of the listener is bound are lost
+        listener.ready.wait(timeout)
+        if task.state in states.READY_STATES:
+            return
+        completed.wait(max(deadline - time.monotonic(), 0))
+
+
+_listener = per_process(CompletionListener)
+
+
+def get_listener(app):
+    """Returns the completion listener of the current process, starting it on first call.
+
+    Args:
+        app (Celery): Celery application whose broker carries the notifications
+
+    Returns:
+        CompletionListener: Completion listener of the process
+    """
+
+    return _listener(app)
@@ -0,0 +1,77 @@
+"""Module that provides the routing of the celery tasks to queues by class of task.
+ Quick probes, long echoes and batch jobs are sent to their own queue, each consumed by its
+ own worker, so long tasks never delay the probes queued behind them.
+ The options of the worker consuming a queue are printed by:
+    python3 -m simulator_api.celery_tasks.queues <queue>"""
+
+import sys
+from collections import namedtuple
+
+from simulator_api.utils.config import load_config
+from simulator_api.utils.utils import available_cores
+
+TaskQueue = namedtuple("TaskQueue", ["tasks", "prefetch_multiplier", "beat"], defaults=[False])
+
+TASKS_MODULE = "simulator_api.celery_tasks.tasks"
+# Queue of the tasks sent without route, e.g. queued before the routing was introduced
+DEFAULT_QUEUE = "celery"
+
+QUEUES = {
+    # Short tasks reporting the state of the simulator, prefetched to be started right away
+    'probes': TaskQueue(tasks=("communication_test", "publish_topic"), prefetch_multiplier=4),
+    # Long tasks, only reserved by an idle process so they do not wait behind each other
+    'echoes': TaskQueue(tasks=("echo_topic",), prefetch_multiplier=1),
+    # Its worker also runs the scheduler of the periodic tasks
+    'batches': TaskQueue(
+        tasks=("echo_topics", "publish_messages", "prune_databases"),
+        prefetch_multiplier=1,
+        beat=True,
+    ),
+}
+
+
+def task_routes():
+    """Returns the celery routes of the tasks to their queues."""
+
+    return {
+        f"{TASKS_MODULE}.{task}": {'queue': queue}
+        for queue, task_queue in QUEUES.items()
+        for task in task_queue.tasks
+    }
+
+
+def worker_options(queue):
+    """Returns the command line options of the celery worker consuming a queue.
+
+    The concurrency of the worker is set by the [queues] configuration. With autoscale, the
+    worker grows from one process up to this concurrency, at most one process per core.
+
+    Args:
+        queue (string): Name of the queue
+
+    Returns:
+        list: Options of the `celery worker` command
+    """
+
+    if queue not in QUEUES:
+        raise ValueError(f"Not valid queue: {queue}")
+
+    cfg = load_config().queues
+    concurrency = getattr(cfg, f"{queue}_concurrency")
+    queues = f"{queue},{DEFAULT_QUEUE}" if queue == "probes" else queue
+    options = [
+        f"--queues={queues}",
+        f"--hostname={queue}@%h",
+        f"--prefetch-multiplier={QUEUES[queue].prefetch_multiplier}",
+    ]
+    if QUEUES[queue].beat:
+        options.append("--beat")
+    if cfg.autoscale:
+        options.append(f"--autoscale={min(concurrency, available_cores())},1")
+    else:
+        options.append(f"--concurrency={concurrency}")
+    return options
+
+
+if __name__ == '__main__':
+    print(" ".join(worker_options(sys.argv[1])))
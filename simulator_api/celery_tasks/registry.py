@@ -0,0 +1,390 @@
+"""Module that provides the registry of the celery tasks sent by the simulator api.
+ The engine and the table are created once per process and state writes are coalesced
+ by a background thread, so that task signals only cost a single prepared statement.
+ Tasks and states are written by upserts on the task id, so the final state written by a
+ worker is kept even when it lands before the task registered by the api process."""
+
+import os
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.pool import QueuePool
+
+import simulator_api.utils.logger as logging
+from simulator_api.utils.config import get_config
+from simulator_api.utils.process import per_process
+
+TASK_ID_TABLE_NAME = 'celery_tasks'
+TASK_ID_DB_PATH = f"/opt/mov.ai/app/celery_data/{TASK_ID_TABLE_NAME}.sqlite3"
+IDEMPOTENCY_TABLE_NAME = 'idempotency_keys'
+
+
+def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+class TaskRegistry:
+    """Registry of the celery tasks stored in a sqlite database"""
+
+    def __init__(self, db_path=TASK_ID_DB_PATH, flush_interval=0.05, pool_size=5):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+
+        self.engine = sqlalchemy.create_engine(
+            f'sqlite:///{db_path}', poolclass=QueuePool, pool_size=pool_size
+        )
+        event.listen(self.engine, "connect", _set_sqlite_pragmas)
+
+        self.meta = sqlalchemy.MetaData()
+        self.table = sqlalchemy.Table(
+            TASK_ID_TABLE_NAME,
+            self.meta,
+            sqlalchemy.Column('id', sqlalchemy.Integer, primary_key=True),
+            sqlalchemy.Column('task_id', sqlalchemy.String),
+            sqlalchemy.Column('state', sqlalchemy.String),
+            sqlalchemy.Column('created', sqlalchemy.DateTime),
+            sqlalchemy.Index(f'ux_{TASK_ID_TABLE_NAME}_task_id', 'task_id', unique=True),
+            sqlalchemy.Index(f'ix_{TASK_ID_TABLE_NAME}_created', 'created'),
+        )
+        # Tasks started by the requests with an idempotency key
+        self.keys_table = sqlalchemy.Table(
+            IDEMPOTENCY_TABLE_NAME,
+            self.meta,
+            sqlalchemy.Column('key', sqlalchemy.String, primary_key=True),
+            sqlalchemy.Column('fingerprint', sqlalchemy.String),
+            sqlalchemy.Column('task_id', sqlalchemy.String),
+            sqlalchemy.Column('created', sqlalchemy.DateTime),
+        )
+        # Only creates the table if it does not exist yet
+        self.meta.create_all(self.engine)
+        self._migrate()
+
+        # Statements are built once and reused with executemany
+        insert = sqlite.insert(self.table)
+        # A task whose state was written first only gets its creation date
+        self._insert = insert.on_conflict_do_update(
+            index_elements=[self.table.columns.task_id],
+            set_={'created': insert.excluded.created},
+        )
+        # A task not registered yet is inserted with its state
+        self._update = insert.on_conflict_do_update(
+            index_elements=[self.table.columns.task_id],
+            set_={'state': insert.excluded.state},
+        )
+
+        self._new_tasks = {}
+        self._states = {}
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._writer = threading.Thread(target=self._write_behind, daemon=True)
+        self._writer.start()
+
+    def _migrate(self):
+        """Creates the indexes missing from the tables created by previous versions."""
+
+        indexes = {
+            index['name']
+            for index in sqlalchemy.inspect(self.engine).get_indexes(TASK_ID_TABLE_NAME)
+        }
+        with self.engine.begin() as conn:
+            if f'ux_{TASK_ID_TABLE_NAME}_task_id' not in indexes:
+                # Task ids registered twice by the previous versions keep their last row
+                conn.execute(
+                    sqlalchemy.delete(self.table).where(
+                        self.table.columns.id.not_in(
+                            sqlalchemy.select(sqlalchemy.func.max(self.table.columns.id)).group_by(
+                                self.table.columns.task_id
+                            )
+                        )
+                    )
+                )
+                conn.execute(
+                    sqlalchemy.text(f"DROP INDEX IF EXISTS ix_{TASK_ID_TABLE_NAME}_task_id")
+                )
+            for index in self.table.indexes:
+                index.create(conn, checkfirst=True)
+
+    def add_task(self, task_id, state="SENT", created=None):
+        """Registers a new task.
+
+        Args:
+            task_id (string): Id of the task
+            state (string, optional): Initial state of the task. Defaults to "SENT".
+            created (datetime, optional): Creation date. Defaults to now.
+        """
+
+        with self._lock:
+            self._new_tasks[task_id] = {
+                'task_id': task_id,
+                'state': state,
+                'created': created or datetime.now(),
+            }
+        self._pending.set()
+
+    def set_state(self, task_id, state):
+        """Updates the state of a task, only the last state written before a flush is kept.
+
+        The task is registered if it is not yet, e.g. when the api process writes it later.
+
+        Args:
+            task_id (string): Id of the task
+            state (string): New state of the task
+        """
+
+        with self._lock:
+            if task_id in self._new_tasks:
+                self._new_tasks[task_id]['state'] = state
+            else:
+                self._states[task_id] = {
+                    'task_id': task_id,
+                    'state': state,
+                    'created': datetime.now(),
+                }
+        self._pending.set()
+
+    def flush(self):
+        """Writes the pending changes in a single transaction."""
+
+        with self._lock:
+            new_tasks, self._new_tasks = list(self._new_tasks.values()), {}
+            states, self._states = self._states, {}
+
+        if not new_tasks and not states:
+            return
+
+        with self.engine.begin() as conn:
+            if new_tasks:
+                conn.execute(self._insert, new_tasks)
+            if states:
+                conn.execute(self._update, list(states.values()))
+
+    def _write_behind(self):
+        while True:
+            self._pending.wait()
+            # Let writes arriving meanwhile accumulate into the same batch
+            time.sleep(self.flush_interval)
+            self._pending.clear()
+            try:
+                self.flush()
+            except sqlalchemy.exc.SQLAlchemyError:
+                logging.exception("Failed to write the celery tasks registry")
+
+    def task_ids(self):
+        """Retrieves the ids and states of all registered tasks
+
+        Returns:
+            list: list of (task_id, state) tuples
+        """
+
+        self.flush()
+        with self.engine.connect() as conn:
+            return conn.execute(
+                sqlalchemy.select(self.table.columns.task_id, self.table.columns.state)
+            ).fetchall()
+
+    def has_task(self, task_id):
+        """Checks if a task is registered
+
+        Args:
+            task_id (string): Id of the task
+
+        Returns:
+            bool: True if the task is registered
+        """
+
+        self.flush()
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                sqlalchemy.select(self.table.columns.id)
+                .where(self.table.columns.task_id == task_id)
+                .limit(1)
+            ).first()
+        return row is not None
+
+    def list_tasks(self, limit=50, cursor=None, state=None, since=None, until=None):
+        """Retrieves a page of registered tasks, most recent first
+
+        Args:
+            limit (int, optional): Maximum number of tasks returned. Defaults to 50.
+            cursor (int, optional): Cursor returned with the previous page. Defaults to None.
+            state (string, optional): Only return tasks in this state. Defaults to None.
+            since (datetime, optional): Only return tasks created from this date. Defaults to None.
+            until (datetime, optional): Only return tasks created before this date.
+              Defaults to None.
+
+        Returns:
+            tasks (list): list of task dictionaries with keys 'task_id', 'state' and 'created'
+            next_cursor (int): cursor of the next page, None if this is the last page
+        """
+
+        columns = self.table.columns
+        query = sqlalchemy.select(columns.id, columns.task_id, columns.state, columns.created)
+        if cursor is not None:
+            query = query.where(columns.id < cursor)
+        if state is not None:
+            query = query.where(columns.state == state)
+        if since is not None:
+            query = query.where(columns.created >= since)
+        if until is not None:
+            query = query.where(columns.created < until)
+        # Fetch one more row to know if there is a next page
+        query = query.order_by(columns.id.desc()).limit(limit + 1)
+
+        self.flush()
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        tasks = [
+            {
+                'task_id': row.task_id,
+                'state': row.state,
+                'created': row.created.isoformat() if row.created else None,
+            }
+            for row in rows[:limit]
+        ]
+        return tasks, next_cursor
+
+    def claim_key(self, key, fingerprint, task_id, window):
+        """Maps an idempotency key to a task, unless the key is already mapped to a task created
+        less than window seconds ago.
+
+        The key is claimed by a single upsert, so concurrent requests with the same key, in any
+        process, all get the task of the first one.
+
+        Args:
+            key (string): Idempotency key of the request
+            fingerprint (string): Hash of the parameters of the request
+            task_id (string): Id of the task started if the key is claimed
+            window (float): Seconds during which the key keeps its task
+
+        Returns:
+            task_id (string): Id of the task mapped to the key
+            fingerprint (string): Hash of the parameters of the request that claimed the key
+        """
+
+        columns = self.keys_table.columns
+        now = datetime.now()
+        claim = sqlite.insert(self.keys_table).values(
+            key=key, fingerprint=fingerprint, task_id=task_id, created=now
+        )
+        claim = claim.on_conflict_do_update(
+            index_elements=[columns.key],
+            set_={'fingerprint': fingerprint, 'task_id': task_id, 'created': now},
+            where=columns.created < now - timedelta(seconds=window),
+        )
+        with self.engine.begin() as conn:
+            conn.execute(claim)
+            row = conn.execute(
+                sqlalchemy.select(columns.task_id, columns.fingerprint).where(columns.key == key)
+            ).first()
+        return row.task_id, row.fingerprint
+
+    def release_key(self, key, task_id):
+        """Removes the mapping of an idempotency key to a task, e.g. a task failing to be sent.
+
+        Args:
+            key (string): Idempotency key of the request
+            task_id (string): Id of the task mapped to the key
+        """
+
+        columns = self.keys_table.columns
+        with self.engine.begin() as conn:
+            conn.execute(
+                sqlalchemy.delete(self.keys_table).where(
+                    (columns.key == key) & (columns.task_id == task_id)
+                )
+            )
+
+    def prune(self, max_age=0, max_rows=0, keys_max_age=0):
+        """Deletes the tasks created more than max_age seconds ago or beyond the max_rows most
+        recent ones, and the idempotency keys older than keys_max_age seconds. A limit of 0 is
+        not applied.
+
+        Args:
+            max_age (int, optional): Maximum age of the tasks in seconds. Defaults to 0.
+            max_rows (int, optional): Maximum number of tasks. Defaults to 0.
+            keys_max_age (int, optional): Maximum age of the idempotency keys in seconds.
+              Defaults to 0.
+
+        Returns:
+            int: Number of deleted tasks
+        """
+
+        columns = self.table.columns
+        now = datetime.now()
+        deleted = 0
+
+        self.flush()
+        with self.engine.begin() as conn:
+            if max_age > 0:
+                deleted += conn.execute(
+                    sqlalchemy.delete(self.table).where(
+                        columns.created < now - timedelta(seconds=max_age)
+                    )
+                ).rowcount
+            if max_rows > 0:
+                last = conn.execute(
+                    sqlalchemy.select(columns.id)
+                    .order_by(columns.id.desc())
+                    .offset(max_rows)
+                    .limit(1)
+                ).scalar()
+                if last is not None:
+                    deleted += conn.execute(
+                        sqlalchemy.delete(self.table).where(columns.id <= last)
+                    ).rowcount
+            if keys_max_age > 0:
+                conn.execute(
+                    sqlalchemy.delete(self.keys_table).where(
+                        self.keys_table.columns.created < now - timedelta(seconds=keys_max_age)
+                    )
+                )
+        return deleted
+
+    def close(self):
+        """Writes the pending changes and releases the pooled connections."""
+
+        try:
+            self.flush()
+        finally:
+            self.engine.dispose()
+
+
+_registry = per_process(lambda: TaskRegistry(get_config().celery.registry_path))
+
+
+@atexit.register
+def close_registry():
+    """Closes the task registry of the current process if it was created."""
+    # Only the process that created it releases it, not its forked children
+    registry = _registry.current()
+    if registry is not None:
+        registry.close()
+
+
+def get_registry():
+    """Returns the task registry of the current process, creating it on first call.
+
+    The registry is recreated after a fork (e.g. in the celery pool processes), since
+    pooled connections and the writer thread must not be shared with the parent.
+
+    Returns:
+        TaskRegistry: Task registry of the process
+    """
+
+    return _registry()
+
+
+def registry_exists():
+    """Whether the task registry database was already created."""
+    return os.path.exists(get_config().celery.registry_path)
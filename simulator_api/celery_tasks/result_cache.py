@@ -0,0 +1,95 @@
+"""Module that provides the in-memory cache of the completed celery task results.
+ The result of a complete task never changes, so once read from the result backend it is
+ kept in a bounded LRU cache of the api process, expiring after a time to live."""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from celery import states
+
+from simulator_api.utils.process import per_process
+from simulator_api.utils.metrics import RESULT_CACHE_LOOKUPS
+
+# Results that never change once stored
+CACHED_STATES = frozenset([states.SUCCESS, states.FAILURE])
+
+CachedResult = namedtuple("CachedResult", ["id", "state", "info"])
+
+
+class ResultCache:
+    """LRU cache of task results with a time to live"""
+
+    def __init__(self, max_size=1024, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, task_id):
+        """Returns the cached result of a task.
+
+        Args:
+            task_id (string): Id of the task
+
+        Returns:
+            CachedResult: Result of the task, None if not cached or expired
+        """
+
+        with self._lock:
+            entry = self._results.get(task_id)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._results[task_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                RESULT_CACHE_LOOKUPS.labels("miss").inc()
+                return None
+            self._results.move_to_end(task_id)
+            self.hits += 1
+            RESULT_CACHE_LOOKUPS.labels("hit").inc()
+            return entry[1]
+
+    def put(self, result):
+        """Caches the result of a task, evicting the least recently used results if full.
+
+        Args:
+            result (CachedResult): Result of the task
+        """
+
+        with self._lock:
+            self._results[result.id] = (time.monotonic(), result)
+            self._results.move_to_end(result.id)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """Removes all the cached results."""
+
+        with self._lock:
+            self._results.clear()
+
+    def stats(self):
+        """Returns the hit and miss counters and the number of cached results."""
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._results)}
+
+
+_cache = per_process(ResultCache)
+
+
+def get_result_cache(max_size=1024, ttl=3600):
+    """Returns the result cache of the current process, creating it on first call.
+
+    Args:
+        max_size (int, optional): Maximum number of cached results.
+        ttl (float, optional): Seconds after which a cached result expires.
+
+    Returns:
+        ResultCache: Result cache of the process
+    """
+
+    return _cache(max_size=max_size, ttl=ttl)
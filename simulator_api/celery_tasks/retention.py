@@ -0,0 +1,149 @@
+"""Module that provides the retention policy of the sqlite databases of the celery tasks.
+ The task registry and the result backend are periodically pruned of the tasks older than
+ max_age seconds or beyond the max_rows most recent ones, then their free pages are released
+ by an incremental vacuum, so their size and query latency do not grow with the uptime."""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from simulator_api.utils.config import get_config
+
+SQLITE_URL_PREFIXES = ("db+sqlite:///", "sqlite:///")
+# Value of PRAGMA auto_vacuum for databases releasing their free pages on demand
+INCREMENTAL_VACUUM = 2
+# Seconds to wait for the lock of a database written by another process
+BUSY_TIMEOUT = 5
+# Maximum size in bytes of a database converted to incremental vacuum while tasks run, the
+# full vacuum of larger ones locking them longer than the busy timeout of the other processes
+MAX_ONLINE_CONVERSION_SIZE = 16 * 1024 * 1024
+
+
+def sqlite_path(url):
+    """Returns the path of the sqlite database of a SQLAlchemy url, None for other databases."""
+
+    for prefix in SQLITE_URL_PREFIXES:
+        if url.startswith(prefix):
+            return url[len(prefix) :]
+    return None
+
+
+def database_paths():
+    """Returns the paths of the sqlite databases of the celery tasks, by database name.
+
+    Returns:
+        dict: paths of the 'registry' and, if stored in sqlite, 'results' databases
+    """
+
+    cfg = get_config().celery
+    paths = {'registry': cfg.registry_path}
+    results_path = sqlite_path(cfg.result_backend)
+    if results_path is not None:
+        paths['results'] = results_path
+    return paths
+
+
+def database_size(path):
+    """Returns the size in bytes of a sqlite database and its write-ahead log, 0 if missing."""
+
+    return sum(os.path.getsize(file) for file in (path, f"{path}-wal") if os.path.exists(file))
+
+
+def prune_results(backend, max_age=0, max_rows=0):
+    """Deletes the task results stored more than max_age seconds ago or beyond the max_rows most
+    recent ones. A limit of 0 is not applied.
+
+    Args:
+        backend (DatabaseBackend): Result backend of the celery app
+        max_age (int, optional): Maximum age of the results in seconds. Defaults to 0.
+        max_rows (int, optional): Maximum number of results. Defaults to 0.
+
+    Returns:
+        int: Number of deleted results
+    """
+
+    from celery.backends.database import session_cleanup
+
+    Task = backend.task_cls
+    deleted = 0
+    session = backend.ResultSession()
+    with session_cleanup(session):
+        if max_age > 0:
+            # Results are dated in UTC by the backend
+            expired = datetime.utcnow() - timedelta(seconds=max_age)
+            deleted += (
+                session.query(Task)
+                .filter(Task.date_done < expired)
+                .delete(synchronize_session=False)
+            )
+        if max_rows > 0:
+            last = (
+                session.query(Task.id).order_by(Task.id.desc()).offset(max_rows).limit(1).scalar()
+            )
+            if last is not None:
+                deleted += (
+                    session.query(Task).filter(Task.id <= last).delete(synchronize_session=False)
+                )
+        session.commit()
+    return deleted
+
+
+def enable_incremental_vacuum(path, max_size=None):
+    """Converts a sqlite database created without incremental auto vacuum by a full vacuum.
+
+    The full vacuum rewrites the whole database under an exclusive lock, so large databases are
+    converted at the startup of the worker applying the retention policy, before it consumes
+    tasks.
+
+    Args:
+        path (string): Path of the sqlite database
+        max_size (int, optional): Size in bytes above which the database is not converted.
+          Defaults to None (no limit).
+
+    Returns:
+        bool: Whether the database was converted
+    """
+
+    if not os.path.exists(path) or (max_size is not None and database_size(path) > max_size):
+        return False
+
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == INCREMENTAL_VACUUM:
+            return False
+        conn.execute(f"PRAGMA auto_vacuum={INCREMENTAL_VACUUM}")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return True
+
+
+def compact(path):
+    """Releases the free pages of a sqlite database to the file system and truncates its
+    write-ahead log.
+
+    Databases created without incremental auto vacuum, e.g. after the startup of the worker,
+    are converted on the first call while smaller than MAX_ONLINE_CONVERSION_SIZE; the next
+    calls only move the free pages to the end of the file and truncate it.
+
+    Args:
+        path (string): Path of the sqlite database
+
+    Returns:
+        int: Number of released pages
+    """
+
+    if not os.path.exists(path):
+        return 0
+
+    enable_incremental_vacuum(path, max_size=MAX_ONLINE_CONVERSION_SIZE)
+
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    try:
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # Run as a script, a single execute only releases one page
+        conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    finally:
+        conn.close()
+    return free_pages
@@ -0,0 +1,163 @@
+"""Module that provides the delivery of the task results to callback urls.
+ Results are queued by the worker after a task completes and posted by a background thread,
+ retried with an exponential backoff, so that slow or failing receivers never delay tasks."""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+import requests
+
+import simulator_api.utils.logger as logging
+from simulator_api.utils.process import per_process
+
+
+class Delivery:
+    """Result of a task to be posted to a callback url"""
+
+    def __init__(self, url, payload):
+        self.url = url
+        self.payload = payload
+        self.attempts = 0
+
+
+class WebhookDispatcher:
+    """Posts the queued deliveries, retrying the failed ones with an exponential backoff"""
+
+    def __init__(self, queue_size=1000, timeout=5, max_retries=5, backoff=1, max_backoff=60):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queue_size = queue_size
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+
+        # Bounded with the retries by queue_size
+        self._queue = queue.Queue()
+        # Deliveries waiting for their next attempt, as (due time, sequence, delivery)
+        self._retries = []
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._deliver, daemon=True)
+        self._thread.start()
+
+    def submit(self, url, payload):
+        """Queues the delivery of a payload, dropped if queue_size deliveries are already queued
+        or waiting for a retry.
+
+        Args:
+            url (string): Callback url receiving the payload
+            payload (dict): Json payload to post
+
+        Returns:
+            bool: True if the delivery was queued
+        """
+
+        with self._idle:
+            if self._queue.qsize() + len(self._retries) >= self.queue_size:
+                self.dropped += 1
+                logging.warning(f"Webhook queue full, dropping the delivery to {url}")
+                return False
+            self._pending += 1
+            self._queue.put_nowait(Delivery(url, payload))
+        return True
+
+    def flush(self, timeout=None):
+        """Waits until all the queued deliveries are delivered or abandoned.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to None.
+
+        Returns:
+            bool: True if no delivery is pending
+        """
+
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _done(self):
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def _post(self, delivery):
+        delivery.attempts += 1
+        try:
+            response = self._session.post(delivery.url, json=delivery.payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            return False, True, str(e)
+        if response.ok:
+            return True, False, None
+        # Client errors other than throttling will not succeed on retry
+        retry = response.status_code == 429 or response.status_code >= 500
+        return False, retry, f"HTTP {response.status_code}"
+
+    def _attempt(self, delivery):
+        success, retry, error = self._post(delivery)
+        if success:
+            self.delivered += 1
+            self._done()
+        elif retry and delivery.attempts <= self.max_retries:
+            delay = min(self.backoff * 2 ** (delivery.attempts - 1), self.max_backoff)
+            heapq.heappush(
+                self._retries, (time.monotonic() + delay, next(self._sequence), delivery)
+            )
+        else:
+            self.failed += 1
+            logging.warning(f"Failed to deliver the webhook to {delivery.url}: {error}")
+            self._done()
+
+    def _deliver(self):
+        while True:
+            timeout = max(self._retries[0][0] - time.monotonic(), 0) if self._retries else None
+            try:
+                self._attempt(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+            while self._retries and self._retries[0][0] <= time.monotonic():
+                self._attempt(heapq.heappop(self._retries)[2])
+
+
+_dispatcher = per_process(WebhookDispatcher)
+
+
+def get_dispatcher(queue_size=1000, timeout=5, max_retries=5, backoff=1, max_backoff=60):
+    """Returns the webhook dispatcher of the current process, creating it on first call.
+
+    Args:
+        queue_size (int, optional): Maximum number of deliveries queued or waiting for a retry.
+        timeout (float, optional): Timeout in seconds of each post.
+        max_retries (int, optional): Number of retries of a failed delivery.
+        backoff (float, optional): Seconds before the first retry, doubled on each retry.
+        max_backoff (float, optional): Maximum number of seconds between two retries.
+
+    Returns:
+        WebhookDispatcher: Webhook dispatcher of the process
+    """
+
+    return _dispatcher(
+        queue_size=queue_size,
+        timeout=timeout,
+        max_retries=max_retries,
+        backoff=backoff,
+        max_backoff=max_backoff,
+    )
+
+
+def flush_dispatcher(timeout):
+    """Waits for the pending deliveries of the current process, if its dispatcher was created.
+
+    Args:
+        timeout (float): Maximum number of seconds to wait.
+    """
+
+    dispatcher = _dispatcher.current()
+    if dispatcher is not None:
+        if not dispatcher.flush(timeout):
+            logging.warning("Exiting with undelivered webhooks")
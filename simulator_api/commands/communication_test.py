@@ -4,12 +4,20 @@
 
 import re
 import requests
+from datetime import datetime
 from WebServerCore.ICommand import ICommand
-from werkzeug.exceptions import NotFound, BadRequest
+from werkzeug.exceptions import NotFound, BadRequest, UnprocessableEntity
 
 import simulator_api.utils.logger as logging
-from simulator_api.utils.utils import parse_config
-from simulator_api.celery_tasks.tasks import communication_test, get_task_ids
+from simulator_api.utils.utils import callback_headers, idempotency_key, parse_wait
+from simulator_api.utils.config import get_config
+from simulator_api.celery_tasks.tasks import (
+    communication_test,
+    start_communication_test,
+    task_result,
+)
+
+MAX_LIST_LIMIT = 500
 
 
 class CommunicationTest(ICommand):
@@ -22,7 +30,8 @@ class CommunicationTest(ICommand):
         """Version 1 Handler for get requests of communication-test entrypoint.
 
         Args:
-            _url_params (obj): optional url params
+            _url_params (obj): optional url parameters, 'wait' is the number of seconds to wait
+              for the task to complete before answering
             task_id (string): callback id used to retrieve results of a previous POST request.
 
         Returns:
@@ -35,13 +44,17 @@ class CommunicationTest(ICommand):
         response.status_code = 200
 
         if task_id is None or task_id == "":
-            response._content = f"Celery tasks: [{', '.join(get_task_ids())}]"
+            response._content = self.list_tasks(_url_params)
             return response
 
-        task = communication_test.AsyncResult(task_id)
+        wait = parse_wait(_url_params, get_config().communication.max_wait)
+
+        task = task_result(communication_test, task_id, wait=wait)
 
         if task.state == 'PENDING':
-            if task.id in [item.split()[0] for item in get_task_ids()]:
+            from simulator_api.celery_tasks.registry import get_registry, registry_exists
+
+            if registry_exists() and get_registry().has_task(task_id):
                 raise NotFound(
                     f"Resource with task ID {task_id} not found, but task waiting to be run."
                 )
@@ -54,6 +67,97 @@ class CommunicationTest(ICommand):
 
         return response
 
+    @staticmethod
+    def list_tasks(url_params):
+        """Lists the registered celery tasks, most recent first.
+
+        Args:
+            url_params (dict): optional filters: 'limit', 'cursor', 'state', 'since' and 'until'
+              ('since' and 'until' are ISO 8601 dates).
+
+        Returns:
+            dict: json with the page of tasks under 'tasks' and the cursor of the next page
+              under 'next_cursor'
+        """
+
+        url_params = url_params or {}
+        limit, cursor, state, since, until = (
+            url_params.get("limit"),
+            url_params.get("cursor"),
+            url_params.get("state"),
+            url_params.get("since"),
+            url_params.get("until"),
+        )
+
+        try:
+            limit = 50 if limit is None or limit == "" else int(limit)
+            cursor = None if cursor is None or cursor == "" else int(cursor)
+        except ValueError:
+            raise BadRequest(f"Not valid limit or cursor: {limit}, {cursor}")
+        if limit <= 0 or limit > MAX_LIST_LIMIT:
+            raise BadRequest(f"Limit must be between 1 and {MAX_LIST_LIMIT}: {limit}")
+        try:
+            since = None if since is None or since == "" else datetime.fromisoformat(since)
+            until = None if until is None or until == "" else datetime.fromisoformat(until)
+        except ValueError:
+            raise BadRequest(f"Not valid date: {since}, {until}")
+        state = None if state == "" else state
+
+        from simulator_api.celery_tasks.registry import get_registry, registry_exists
+
+        tasks, next_cursor = [], None
+        if registry_exists():
+            tasks, next_cursor = get_registry().list_tasks(
+                limit=limit, cursor=cursor, state=state, since=since, until=until
+            )
+
+        return {'tasks': tasks, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def parse_args(url_params, max_timeout):
+        """Validates the optional inputs of a communication test.
+
+        Args:
+            url_params (dict): optional inputs: 'echo-topic', 'publish-topic', 'world-name' and
+              'timeout'
+            max_timeout (int): maximum timeout allowed
+
+        Returns:
+            tuple: arguments of the communication test task, empty if no input was provided
+        """
+
+        # Check if optional params were provided
+        if url_params is None or url_params == "":
+            return ()
+
+        echo_topic, publish_topic, world_name, duration = (
+            url_params.get("echo-topic"),
+            url_params.get("publish-topic"),
+            url_params.get("world-name"),
+            url_params.get("timeout"),
+        )
+
+        # Verification of inputs
+        for topic in [echo_topic, publish_topic]:
+            if not (topic is None or topic == "") and topic[0] != "/":
+                raise BadRequest(f"Not valid topic: {topic}")
+        if (
+            not (world_name is None or world_name == "")
+            and re.compile(r'^[a-zA-Z0-9_]+$').match(world_name) is None
+        ):
+            raise BadRequest(f"Not valid world name: {world_name}")
+        if not (duration is None or duration == ""):
+            try:
+                duration = int(duration)
+            except ValueError:
+                raise BadRequest(f"Not valid timeout: {duration}")
+            if duration > max_timeout or duration < 0:
+                raise BadRequest(
+                    f"Timeout negative or larger than maximum allowed ({max_timeout}): {duration}"
+                )
+
+        return (echo_topic, publish_topic, world_name, duration)
+
     def post_execute_latest(self, url_params, body_data, url_specifics):
         return self.post_execute_v1(url_params, body_data, url_specifics)
 
@@ -61,7 +165,7 @@ class CommunicationTest(ICommand):
         """Version 1 Handler for post requests of communication-test entrypoint.
 
         Args:
-            url_params (dict): json containing the optional inputs for an echo POST request: 'echo-topic', 'publish-topic', 'world-name' and 'timeout'
+            url_params (dict): json containing the optional inputs for an echo POST request: 'echo-topic', 'publish-topic', 'world-name' and 'timeout', and 'callback', url receiving the result of the test
             body_data (obj): optional body data
             url_specifics (obj): optional url inputs
 
@@ -71,43 +175,15 @@ class CommunicationTest(ICommand):
 
         logging.debug("Post Communication Test command reached")
 
-        # Get maximum timeout allowed
-        cfg = parse_config()
-        max_timeout = int(cfg.get("communication", "max_timeout"))
-
-        # Check if optional params were provided
-        if url_params is None or url_params == "":
-            task = communication_test.apply_async()
-        else:
-            echo_topic, publish_topic, world_name, duration = (
-                url_params.get("echo-topic"),
-                url_params.get("publish-topic"),
-                url_params.get("world-name"),
-                url_params.get("timeout"),
-            )
+        args = self.parse_args(url_params, get_config().communication.max_timeout)
 
-            # Verification of inputs
-            for topic in [echo_topic, publish_topic]:
-                if not (topic is None or topic == "") and topic[0] != "/":
-                    raise BadRequest(f"Not valid topic: {topic}")
-            if (
-                not (world_name is None or world_name == "")
-                and re.compile(r'^[a-zA-Z0-9_]+$').match(world_name) is None
-            ):
-                raise BadRequest(f"Not valid world name: {world_name}")
-            if not (duration is None or duration == ""):
-                try:
-                    duration = int(duration)
-                except ValueError:
-                    raise BadRequest(f"Not valid timeout: {duration}")
-                if duration > max_timeout or duration < 0:
-                    raise BadRequest(
-                        f"Timeout negative or larger than maximum allowed ({max_timeout}): {duration}"
-                    )
-
-            task = communication_test.apply_async(
-                args=(echo_topic, publish_topic, world_name, duration)
+        # Retries of a request with the same Idempotency-Key header get the same test
+        try:
+            task = start_communication_test(
+                args, headers=callback_headers(url_params), idempotency_key=idempotency_key()
             )
+        except ValueError as e:
+            raise UnprocessableEntity(str(e))
 
         response = requests.Response()
         response._content = {'task_id': task.id}
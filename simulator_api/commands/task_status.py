@@ -0,0 +1,157 @@
+"""Module that provides the Service command task-status.
+ The purpose of this module is to expose the capability of retrieving the status of many
+ celery tasks with a single request"""
+
+import json
+import requests
+from WebServerCore.ICommand import ICommand
+from WebServerCore.utils.exception import InvalidInputException
+from werkzeug.exceptions import BadRequest
+
+import simulator_api.utils.logger as logging
+from simulator_api.utils.utils import parse_wait
+from simulator_api.utils.config import get_config
+from simulator_api.celery_tasks.tasks import task_result, task_results
+
+
+def task_info(result):
+    """Returns the info of a task as answered by the task status requests of the commands.
+
+    Args:
+        result (AsyncResult or CachedResult): result of the task
+
+    Returns:
+        dict: json with the status of a pending or failed task, the info of the task otherwise
+    """
+
+    if result.state == 'PENDING':
+        return {'status': 'Celery Task is pending'}
+    elif result.state != 'FAILURE':
+        return result.info
+    else:
+        return {'status': 'Celery Task failed'}
+
+
+def task_status(result):
+    """Returns the status of a task as answered by the task-status requests.
+
+    Args:
+        result (CachedResult): result of the task
+
+    Returns:
+        dict: json with the 'state' of the task and its 'info'
+    """
+
+    return {'state': result.state, 'info': task_info(result)}
+
+
+def task_info_response(task, task_id, url_params):
+    """Answers the get request of a command for the status of one of its tasks.
+
+    Args:
+        task (Task): Celery task of the command
+        task_id (string): Id of the task
+        url_params (dict): optional url parameters, 'wait' is the number of seconds to wait
+          for the task to complete before answering
+
+    Returns:
+        response (request): Response with the info of the task.
+    """
+
+    wait = parse_wait(url_params, get_config().communication.max_wait)
+
+    response = requests.Response()
+    response._content = task_info(task_result(task, task_id, wait=wait))
+    response.status_code = 200
+    return response
+
+
+class TaskStatus(ICommand):
+    """Service Command to retrieve the status of many tasks"""
+
+    def get_execute_latest(self, url_params, url_specifics):
+        return self.get_execute_v1(url_params, url_specifics)
+
+    def get_execute_v1(self, url_params, url_specifics):
+        """Version 1 Handler for get requests of task-status entrypoint.
+
+        Args:
+            url_params (dict): json containing the mandatory input 'ids', comma separated
+              ids of the tasks
+            url_specifics (obj): optional url specific inputs
+
+        Returns:
+            response (request): Response with the status of each task.
+        """
+
+        logging.debug("Task status command reached")
+
+        ids = (url_params or {}).get("ids")
+        if ids is None or ids == "":
+            raise InvalidInputException()
+
+        return self.tasks_status([task_id for task_id in ids.split(",") if task_id])
+
+    def post_execute_latest(self, url_params, body_data, url_specifics):
+        return self.post_execute_v1(url_params, body_data, url_specifics)
+
+    def post_execute_v1(self, url_params, body_data, url_specifics):
+        """Version 1 Handler for post requests of task-status entrypoint.
+
+        Args:
+            url_params (dict): optional url parameters
+            body_data (obj): json body with the mandatory input 'task_ids', list of task ids
+            url_specifics (obj): optional url specific inputs
+
+        Returns:
+            response (request): Response with the status of each task.
+        """
+
+        logging.debug("Task status command reached")
+
+        if isinstance(body_data, (bytes, str)):
+            try:
+                body_data = json.loads(body_data or "{}")
+            except ValueError:
+                raise BadRequest("Not valid json body")
+        task_ids = (body_data or {}).get("task_ids")
+        if not task_ids:
+            raise InvalidInputException()
+        if not isinstance(task_ids, list) or not all(isinstance(i, str) for i in task_ids):
+            raise BadRequest("Not valid task_ids, expected a list of strings")
+
+        return self.tasks_status(task_ids)
+
+    @staticmethod
+    def tasks_status(task_ids):
+        """Reads the status of the tasks with a single query of the result backend.
+
+        Args:
+            task_ids (list): ids of the tasks
+
+        Returns:
+            response (request): Response with the status of each task under 'tasks'.
+        """
+
+        max_ids = get_config().results.max_status_ids
+        # Duplicated ids are answered once
+        task_ids = list(dict.fromkeys(task_ids))
+        if len(task_ids) > max_ids:
+            raise BadRequest(f"Too many task ids, the maximum allowed is {max_ids}")
+
+        results = task_results(task_ids)
+
+        response = requests.Response()
+        response._content = {
+            'tasks': {task_id: task_status(result) for task_id, result in results.items()}
+        }
+        response.status_code = 200
+        return response
+
+    def command_description(self):
+        description = {
+            "command": "task-status",
+            "method": "GET, POST",
+            "description": "This command will return the status of many tasks of the other commands.",
+        }
+        return description
@@ -1,14 +1,36 @@
 """Module that provides the Service command topic-echo.
 The purpose of this module is to expose the capability of echoing a topic with the Simulator container"""
 
+import json
 import requests
+from itertools import islice
 from WebServerCore.ICommand import ICommand
 from WebServerCore.utils.exception import InvalidInputException
-from werkzeug.exceptions import BadRequest
+from werkzeug.exceptions import BadRequest, ServiceUnavailable
 
 import simulator_api.utils.logger as logging
-from simulator_api.utils.utils import parse_config
-from simulator_api.celery_tasks.tasks import echo_topic
+from simulator_api.utils.utils import callback_headers
+from simulator_api.utils.config import get_config
+from simulator_api.celery_tasks.tasks import echo_topic, start_echo_topic
+from simulator_api.commands.task_status import task_info_response
+
+
+def sse_event(event, data, event_id=None):
+    """Formats a Server-Sent Event.
+
+    Args:
+        event (string): Name of the event
+        data (dict): Data of the event, sent as json
+        event_id (int, optional): Id of the event. Defaults to None.
+
+    Returns:
+        string: Server-Sent Event
+    """
+
+    lines = [f"event: {event}", f"data: {json.dumps(data)}"]
+    if event_id is not None:
+        lines.insert(0, f"id: {event_id}")
+    return "\n".join(lines) + "\n\n"
 
 
 class TopicEcho(ICommand):
@@ -31,7 +53,8 @@ class TopicEcho(ICommand):
         """Version 1 Handler for get requests of topic-echo entrypoint.
 
         Args:
-            _url_params (obj): optional url parameters
+            _url_params (obj): optional url parameters, 'wait' is the number of seconds to wait
+              for the task to complete before answering
             task_id (string): callback id used to retrieve results of a previous POST request.
 
         Returns:
@@ -40,20 +63,7 @@ class TopicEcho(ICommand):
 
         logging.debug("Topic Echo command reached")
 
-        task = echo_topic.AsyncResult(task_id)
-
-        if task.state == 'PENDING':
-            message = {'status': 'Celery Task is pending'}
-        elif task.state != 'FAILURE':
-            message = task.info  # Include any additional info you want
-        else:
-            message = {'status': 'Celery Task failed'}
-
-        response = requests.Response()
-        response._content = message
-        response.status_code = 200
-
-        return response
+        return task_info_response(echo_topic, task_id, _url_params)
 
     def post_execute_latest(self, url_params, body_data, url_specifics):
         return self.post_execute_v1(url_params, body_data, url_specifics)
@@ -62,7 +72,7 @@ class TopicEcho(ICommand):
         """Version 1 Handler for post requests of topic-echo entrypoint.
 
         Args:
-            url_params (dict): json containing the mandatory inputs for an echo POST request: 'topic' and 'timeout'
+            url_params (dict): json containing the mandatory inputs for an echo POST request: 'topic' and 'timeout', and the optional input 'callback', url receiving the result of the echo
             body_data (obj): optional body data
             url_specifics (obj): optional url specific inputs
 
@@ -73,8 +83,7 @@ class TopicEcho(ICommand):
         logging.debug("Topic Echo command reached")
 
         # Get maximum timeout allowed
-        cfg = parse_config()
-        max_timeout = int(cfg.get("communication", "max_timeout"))
+        max_timeout = get_config().communication.max_timeout
 
         topic, timeout = url_params.get("topic"), url_params.get("timeout")
         if topic is None or topic == "" or timeout is None or timeout == "":
@@ -88,18 +97,102 @@ class TopicEcho(ICommand):
         if timeout > max_timeout:
             raise BadRequest(f"Timeout larger than maximum allowed ({max_timeout}): {timeout}")
 
-        task = echo_topic.apply_async(
-            args=(
-                topic,
-                timeout,
-            )
-        )
+        headers = callback_headers(url_params)
+        if headers:
+            # Each callback receives the result of its own task
+            task = echo_topic.apply_async(args=(topic, timeout), headers=headers)
+        else:
+            task = start_echo_topic(topic, timeout)
 
         response = requests.Response()
         response._content = {'task_id': task.id}
         response.status_code = 202
         return response
 
+    def stream_execute_latest(self, url_params):
+        return self.stream_execute_v1(url_params)
+
+    def stream_execute_v1(self, url_params):
+        """Version 1 Handler for streaming requests of topic-echo entrypoint.
+
+        Args:
+            url_params (dict): json containing the inputs for a streamed echo: mandatory 'topic'
+              and optional 'max-count', 'max-duration' (seconds) and 'rate' (maximum number
+              of messages per second, extra messages are dropped)
+
+        Returns:
+            generator: Server-Sent Events, a 'message' event per received message followed
+              by an 'end' event with the status of the echo.
+        """
+
+        logging.debug("Topic Echo stream command reached")
+
+        cfg = get_config()
+        max_stream_duration = cfg.transport.max_stream_duration
+
+        topic, max_count, max_duration, rate = (
+            url_params.get("topic"),
+            url_params.get("max-count"),
+            url_params.get("max-duration"),
+            url_params.get("rate"),
+        )
+        if topic is None or topic == "" or topic[0] != "/":
+            raise BadRequest(f"Not valid topic: {topic}")
+        try:
+            max_count = None if max_count is None or max_count == "" else int(max_count)
+            max_duration = (
+                max_stream_duration
+                if max_duration is None or max_duration == ""
+                else float(max_duration)
+            )
+            rate = None if rate is None or rate == "" else float(rate)
+        except ValueError:
+            raise BadRequest(f"Not valid max-count, max-duration or rate: {url_params}")
+        if max_count is not None and max_count <= 0:
+            raise BadRequest(f"Not valid max-count: {max_count}")
+        if not 0 < max_duration <= max_stream_duration:
+            raise BadRequest(
+                f"Duration negative or larger than maximum allowed ({max_stream_duration}): {max_duration}"
+            )
+        if rate is not None and rate <= 0:
+            raise BadRequest(f"Not valid rate: {rate}")
+
+        # Only streams need the subscriber in the api process
+        from simulator_api.transport.subscriber import get_subscriber, subscriber_available
+
+        if not subscriber_available():
+            raise ServiceUnavailable("Ignition CLI is not available.")
+
+        subscription = get_subscriber(
+            buffer_size=cfg.transport.buffer_size,
+            idle_timeout=cfg.transport.subscription_idle_timeout,
+        ).subscription(topic)
+
+        return self._stream_events(subscription, max_count, max_duration, rate)
+
+    @staticmethod
+    def _stream_events(subscription, max_count, max_duration, rate):
+        messages = subscription.iter_messages(
+            max_duration=max_duration, min_interval=1 / rate if rate else 0
+        )
+
+        count = 0
+        for count, message in enumerate(islice(messages, max_count), start=1):
+            yield sse_event(
+                "message", {'topic': subscription.topic, 'message': message}, event_id=count
+            )
+
+        end = {
+            'topic': subscription.topic,
+            'status': 'SUCCESS' if count > 0 else 'TIMEOUT',
+            'count': count,
+        }
+        if count != max_count and not subscription.alive:
+            end['status'] = 'ERROR'
+            end['exitcode'] = subscription.exitcode
+            end['output'] = subscription.errors
+        yield sse_event("end", end)
+
     def command_description(self):
         description = {
             "command": "topic-echo",
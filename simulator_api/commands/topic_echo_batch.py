@@ -0,0 +1,142 @@
+"""Module that provides the Service command topic-echo-batch.
+The purpose of this module is to expose the capability of echoing many topics with the Simulator
+container in a single task"""
+
+import json
+import requests
+from WebServerCore.ICommand import ICommand
+from WebServerCore.utils.exception import InvalidInputException
+from werkzeug.exceptions import BadRequest
+
+import simulator_api.utils.logger as logging
+from simulator_api.utils.config import get_config
+from simulator_api.celery_tasks.tasks import echo_topics
+from simulator_api.commands.task_status import task_info_response
+
+
+class TopicEchoBatch(ICommand):
+    """Service Command to echo many topics in simulator"""
+
+    def get_execute_latest(self, _url_params, task_id):
+        return self.get_execute_v1(_url_params, task_id)
+
+    def get_execute_v1(self, _url_params, task_id):
+        """Version 1 Handler for get requests of topic-echo-batch entrypoint.
+
+        Args:
+            _url_params (obj): optional url parameters, 'wait' is the number of seconds to wait
+              for the task to complete before answering
+            task_id (string): callback id used to retrieve results of a previous POST request.
+
+        Returns:
+            response (request): Response regarding the status of the echo of the topics.
+        """
+
+        logging.debug("Topic Echo Batch command reached")
+
+        return task_info_response(echo_topics, task_id, _url_params)
+
+    def post_execute_latest(self, url_params, body_data, url_specifics):
+        return self.post_execute_v1(url_params, body_data, url_specifics)
+
+    def post_execute_v1(self, url_params, body_data, url_specifics):
+        """Version 1 Handler for post requests of topic-echo-batch entrypoint.
+
+        Args:
+            url_params (dict): json containing the optional input 'concurrency', maximum number
+              of topics echoed at the same time
+            body_data (obj): json body with the mandatory input 'topics', list of
+              {"topic": topic, "timeout": timeout} objects
+            url_specifics (obj): optional url specific inputs
+
+        Returns:
+            response (request): Callback id to be used to track result
+        """
+
+        logging.debug("Topic Echo Batch command reached")
+
+        cfg = get_config().communication
+        batch = self.parse_topics(body_data, cfg)
+        concurrency = self.parse_concurrency((url_params or {}).get("concurrency"), cfg)
+
+        task = echo_topics.apply_async(args=(batch, concurrency))
+
+        response = requests.Response()
+        response._content = {'task_id': task.id}
+        response.status_code = 202
+        return response
+
+    @staticmethod
+    def parse_topics(body_data, cfg):
+        """Validates the topics of a batch.
+
+        Args:
+            body_data (obj): json body, as a dictionary or a string
+            cfg (CommunicationConfig): communication configuration
+
+        Returns:
+            list: list of {'topic': topic, 'timeout': timeout} dictionaries
+        """
+
+        if isinstance(body_data, (bytes, str)):
+            try:
+                body_data = json.loads(body_data or "{}")
+            except ValueError:
+                raise BadRequest("Not valid json body")
+        topics = (body_data or {}).get("topics")
+        if not topics:
+            raise InvalidInputException()
+        if not isinstance(topics, list) or len(topics) > cfg.max_batch_topics:
+            raise BadRequest(f"Not valid topics, expected a list of at most {cfg.max_batch_topics}")
+
+        batch = {}
+        for item in topics:
+            echo = TopicEchoBatch.parse_topic(item, cfg)
+            if echo['topic'] in batch:
+                raise BadRequest(f"Not valid topic, duplicated: {echo['topic']}")
+            batch[echo['topic']] = echo
+
+        return list(batch.values())
+
+    @staticmethod
+    def parse_topic(item, cfg):
+        """Validates a {"topic": topic, "timeout": timeout} object of a batch."""
+
+        if not isinstance(item, dict):
+            raise BadRequest(f"Not valid topic: {item}")
+        topic, timeout = item.get("topic"), item.get("timeout")
+        if not isinstance(topic, str) or topic == "" or topic[0] != "/":
+            raise BadRequest(f"Not valid topic: {topic}")
+        try:
+            timeout = int(timeout)
+        except (TypeError, ValueError):
+            raise BadRequest(f"Not valid timeout: {timeout}")
+        if timeout > cfg.max_timeout or timeout < 0:
+            raise BadRequest(
+                f"Timeout negative or larger than maximum allowed ({cfg.max_timeout}): {timeout}"
+            )
+        return {'topic': topic, 'timeout': timeout}
+
+    @staticmethod
+    def parse_concurrency(concurrency, cfg):
+        """Validates the optional concurrency of a batch, None if not specified."""
+
+        if concurrency is None or concurrency == "":
+            return None
+        try:
+            concurrency = int(concurrency)
+        except ValueError:
+            raise BadRequest(f"Not valid concurrency: {concurrency}")
+        if concurrency <= 0 or concurrency > cfg.batch_concurrency:
+            raise BadRequest(
+                f"Concurrency must be between 1 and {cfg.batch_concurrency}: {concurrency}"
+            )
+        return concurrency
+
+    def command_description(self):
+        description = {
+            "command": "topic-echo-batch",
+            "method": "GET, POST",
+            "description": "This command will echo many topics in the simulator container in a single task and return the status of each echo.",
+        }
+        return description
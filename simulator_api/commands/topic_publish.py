@@ -7,25 +7,8 @@ from WebServerCore.ICommand import ICommand
 from WebServerCore.utils.exception import InvalidInputException, UnsupportedCommand
 
 import simulator_api.utils.logger as logging
-from simulator_api.utils.utils import container_exec_cmd
-
-
-def publish_topic(topic, message, msgtype):
-    """Starts a process to echo a topic.
-
-    Args:
-        topic (string): Name of the topic from which to publish a message
-        message (string): Message to publish
-        msgtype (string): Type of message being published
-
-    Returns:
-        task_json (dict): Task json specifying the status of the publish.
-    """
-
-    cmd = f'ign topic -p "{message}" -t {topic} --msgtype {msgtype}'
-    task_json = container_exec_cmd(cmd, timeout=None)
-
-    return task_json
+from simulator_api.celery_tasks.tasks import publish_topic
+from simulator_api.commands.task_status import task_info_response
 
 
 class TopicPublish(ICommand):
@@ -45,11 +28,27 @@ class TopicPublish(ICommand):
             "Type of message published.",
         )
 
-    def get_execute_latest(self, _url_params, url_specifics):
-        return self.get_execute_v1(_url_params, url_specifics)
+    def get_execute_latest(self, _url_params, task_id):
+        return self.get_execute_v1(_url_params, task_id)
+
+    def get_execute_v1(self, _url_params, task_id):
+        """Version 1 Handler for get requests of topic-publish entrypoint.
 
-    def get_execute_v1(self, _url_params, url_specifics):
-        raise UnsupportedCommand("Method not supported.")
+        Args:
+            _url_params (obj): optional url parameters, 'wait' is the number of seconds to wait
+              for the task to complete before answering
+            task_id (string): callback id used to retrieve results of a previous POST request.
+
+        Returns:
+            response (request): Response regarding the status of the publish topic.
+        """
+
+        logging.debug("Topic publish command reached")
+
+        if task_id is None or task_id == "":
+            raise UnsupportedCommand("Method not supported.")
+
+        return task_info_response(publish_topic, task_id, _url_params)
 
     def post_execute_latest(self, url_params, body_data, url_specifics):
         return self.post_execute_v1(url_params, body_data, url_specifics)
@@ -64,7 +63,7 @@ class TopicPublish(ICommand):
             url_specifics (obj): optional url specific inputs
 
         Returns:
-            response (request): Response regarding the status of the publish topic.
+            response (request): Callback id to be used to track result
         """
 
         logging.debug("Topic publish command reached")
@@ -86,18 +85,18 @@ class TopicPublish(ICommand):
         if topic[0] != "/":
             raise BadRequest(f"Not valid topic: {topic}")
 
-        result = publish_topic(topic, message, msgtype)
+        task = publish_topic.apply_async(args=(topic, message, msgtype))
 
         response = requests.Response()
-        response._content = result
-        response.status_code = 200
+        response._content = {'task_id': task.id}
+        response.status_code = 202
 
         return response
 
     def command_description(self):
         description = {
             "command": "topic-publish",
-            "method": "POST",
+            "method": "GET, POST",
             "description": "This command will publish a topic in the simulator container and return the status.",
         }
         return description
@@ -0,0 +1,290 @@
+"""Module that provides the Service command topic-publish-bulk.
+ The purpose of this module is to expose the capability of publishing many messages on a topic
+ of the Simulator container at a target rate, as a task or as a stream of acks"""
+
+import json
+import time
+import requests
+from werkzeug.exceptions import BadRequest
+from WebServerCore.ICommand import ICommand
+from WebServerCore.utils.exception import InvalidInputException
+
+import simulator_api.utils.logger as logging
+from simulator_api.utils.config import get_config
+from simulator_api.celery_tasks.tasks import publish_messages
+from simulator_api.commands.task_status import task_info_response
+
+
+def ndjson_message(line):
+    """Parses a NDJSON line holding a message as a json string.
+
+    Args:
+        line (string): line of the NDJSON body
+
+    Returns:
+        string: message to publish
+    """
+
+    message = json.loads(line)
+    if not isinstance(message, str) or message == "":
+        raise ValueError(f"Not a message: {line}")
+    return message
+
+
+def ndjson_line(data):
+    """Serializes a json line of a NDJSON response."""
+    return json.dumps(data) + "\n"
+
+
+class NDJSONMessages:
+    """Messages of a streamed NDJSON body, read until a limit of the stream is reached"""
+
+    def __init__(self, lines, max_messages, max_duration):
+        self.lines = lines
+        self.max_messages = max_messages
+        self.max_duration = max_duration
+        self.deadline = time.monotonic() + max_duration
+        # Number of messages read, and reason why the stream stopped before the end of the body
+        self.count = 0
+        self.stopped = None
+
+    def timed_out(self):
+        return f"Maximum stream duration ({self.max_duration}s) reached, stream stopped."
+
+    def __iter__(self):
+        for number, line in enumerate(self.lines, start=1):
+            if time.monotonic() > self.deadline:
+                break
+            if not line.strip():
+                continue
+            if self.count == self.max_messages:
+                self.stopped = (
+                    f"Maximum number of messages ({self.max_messages}) reached at line {number}, "
+                    "stream stopped."
+                )
+                return
+            try:
+                message = ndjson_message(line)
+            except ValueError:
+                self.stopped = f"Not valid message at line {number}, stream stopped."
+                return
+            self.count += 1
+            yield message
+        # Also reached when the body is not read beyond the deadline
+        if time.monotonic() > self.deadline:
+            self.stopped = self.timed_out()
+
+
+class TopicPublishBulk(ICommand):
+    """Service Command to publish many messages on a topic in simulator"""
+
+    def __init__(self):
+        self._register_mandatory_argument(
+            "topic",
+            "Topic to be published.",
+        )
+        self._register_mandatory_argument(
+            "msgtype",
+            "Type of message published.",
+        )
+
+    def get_execute_latest(self, _url_params, task_id):
+        return self.get_execute_v1(_url_params, task_id)
+
+    def get_execute_v1(self, _url_params, task_id):
+        """Version 1 Handler for get requests of topic-publish-bulk entrypoint.
+
+        Args:
+            _url_params (obj): optional url parameters, 'wait' is the number of seconds to wait
+              for the task to complete before answering
+            task_id (string): callback id used to retrieve results of a previous POST request.
+
+        Returns:
+            response (request): Response regarding the status of the publishes.
+        """
+
+        logging.debug("Topic publish bulk command reached")
+
+        return task_info_response(publish_messages, task_id, _url_params)
+
+    def post_execute_latest(self, url_params, body_data, url_specifics):
+        return self.post_execute_v1(url_params, body_data, url_specifics)
+
+    def post_execute_v1(self, url_params, body_data, url_specifics):
+        """Version 1 Handler for post requests of topic-publish-bulk entrypoint.
+
+        Args:
+            url_params (dict): json containing the mandatory inputs 'topic' and 'msgtype', and
+              the optional input 'rate', target number of messages per second
+            body_data (obj): messages to publish, as a json array of strings or as NDJSON
+              with a json string per line
+            url_specifics (obj): optional url specific inputs
+
+        Returns:
+            response (request): Callback id to be used to track result
+        """
+
+        logging.debug("Topic publish bulk command reached")
+
+        cfg = get_config().transport
+        topic, msgtype, rate = self.parse_params(url_params)
+        messages = self.parse_messages(body_data, cfg.max_bulk_messages)
+        # The publishes of a task hold a worker process of the batches queue
+        duration = (len(messages) - 1) / rate if rate else 0
+        if duration > cfg.max_bulk_duration:
+            raise BadRequest(
+                f"Duration at the requested rate larger than maximum allowed "
+                f"({cfg.max_bulk_duration}): {duration:.0f}"
+            )
+
+        task = publish_messages.apply_async(args=(topic, messages, msgtype, rate))
+
+        response = requests.Response()
+        response._content = {'task_id': task.id}
+        response.status_code = 202
+        return response
+
+    def stream_execute_latest(self, url_params, lines):
+        return self.stream_execute_v1(url_params, lines)
+
+    def stream_execute_v1(self, url_params, lines):
+        """Version 1 Handler for streamed publishes of topic-publish-bulk entrypoint.
+
+        Args:
+            url_params (dict): json containing the mandatory inputs 'topic' and 'msgtype', and
+              the optional input 'rate', target number of messages per second
+            lines (iterable): NDJSON lines of the request body, read as messages are published
+
+        Returns:
+            generator: NDJSON lines with the ack of each message, in completion order, and
+              a last line with the status of the whole stream
+        """
+
+        logging.debug("Topic publish bulk stream reached")
+
+        # Only streams publish from the api process
+        from simulator_api.transport.publisher import publish_stream
+
+        topic, msgtype, rate = self.parse_params(url_params)
+        cfg = get_config().transport
+
+        return self._stream_acks(
+            publish_stream,
+            topic,
+            lines,
+            msgtype,
+            rate,
+            cfg.publish_concurrency,
+            max_messages=cfg.max_bulk_messages,
+            max_duration=cfg.max_stream_duration,
+        )
+
+    @staticmethod
+    def _stream_acks(
+        publish_stream, topic, lines, msgtype, rate, max_in_flight, max_messages, max_duration
+    ):
+        messages = NDJSONMessages(lines, max_messages, max_duration)
+
+        published, errors = 0, 0
+        for ack in publish_stream(
+            topic,
+            iter(messages),
+            msgtype,
+            rate=rate,
+            max_in_flight=max_in_flight,
+            deadline=messages.deadline,
+        ):
+            published += 1
+            errors += ack['status'] != 'SUCCESS'
+            yield ndjson_line(ack)
+        # Messages not scheduled before the deadline are not published
+        if messages.stopped is None and messages.count > published:
+            messages.stopped = messages.timed_out()
+
+        end = {
+            'status': 'ERROR' if errors or messages.stopped else 'SUCCESS',
+            'published': published,
+            'errors': errors,
+        }
+        if messages.stopped:
+            end['output'] = messages.stopped
+        yield ndjson_line(end)
+
+    @staticmethod
+    def parse_params(url_params):
+        """Validates the url parameters of a bulk publish.
+
+        Args:
+            url_params (dict): url parameters 'topic', 'msgtype' and 'rate'
+
+        Returns:
+            tuple: topic, msgtype and rate (None if not specified)
+        """
+
+        url_params = url_params or {}
+        topic, msgtype, rate = (
+            url_params.get("topic"),
+            url_params.get("msgtype"),
+            url_params.get("rate"),
+        )
+        if topic is None or topic == "" or msgtype is None or msgtype == "":
+            raise InvalidInputException()
+        if topic[0] != "/":
+            raise BadRequest(f"Not valid topic: {topic}")
+        if rate is None or rate == "":
+            return topic, msgtype, None
+        try:
+            rate = float(rate)
+        except ValueError:
+            raise BadRequest(f"Not valid rate: {rate}")
+        if rate <= 0:
+            raise BadRequest(f"Not valid rate: {rate}")
+        return topic, msgtype, rate
+
+    @staticmethod
+    def _decode_body(body_data):
+        if isinstance(body_data, bytes):
+            body_data = body_data.decode("utf-8", errors="replace")
+        if not isinstance(body_data, str):
+            return body_data
+        try:
+            return json.loads(body_data)
+        except ValueError:
+            pass
+        try:
+            return [ndjson_message(line) for line in body_data.splitlines() if line.strip()]
+        except ValueError:
+            raise BadRequest("Not valid body, expected a json array or NDJSON")
+
+    @staticmethod
+    def parse_messages(body_data, max_messages):
+        """Validates the messages of a bulk publish.
+
+        Args:
+            body_data (obj): json array of strings, or NDJSON with a json string per line
+            max_messages (int): maximum number of messages
+
+        Returns:
+            list: messages to publish
+        """
+
+        messages = TopicPublishBulk._decode_body(body_data)
+
+        # A NDJSON body with a single line is a json string
+        if isinstance(messages, str):
+            messages = [messages]
+        if not messages:
+            raise InvalidInputException()
+        if not isinstance(messages, list) or len(messages) > max_messages:
+            raise BadRequest(f"Not valid messages, expected a list of at most {max_messages}")
+        if not all(isinstance(message, str) and message != "" for message in messages):
+            raise BadRequest("Not valid messages, expected non empty strings")
+        return messages
+
+    def command_description(self):
+        description = {
+            "command": "topic-publish-bulk",
+            "method": "GET, POST",
+            "description": "This command will publish many messages on a topic in the simulator container at a target rate and return the status.",
+        }
+        return description
@@ -1,5 +1,5 @@
 from flask import Flask
-from simulator_api.rest_server.exposed_methods import commands
+from simulator_api.rest_server.exposed_methods import commands, warm_up
 
 app = Flask(__name__)
 app.register_blueprint(commands)
@@ -9,5 +9,12 @@ app.register_blueprint(commands)
 # csrf = CSRFProtect()
 # csrf.init_app(app)  # Compliant
 
+
+def main(port=8081):
+    """Runs the development server, warmed up before it accepts requests."""
+    warm_up()
+    app.run(port=port)
+
+
 if __name__ == '__main__':
-    app.run(port=8081)
+    main()
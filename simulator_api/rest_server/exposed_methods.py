@@ -1,20 +1,51 @@
 """Module required by all WebServer functions that take advantage of the WebServer core functionalities."""
 
 import json
+import socket
+import threading
+import time
 
-from flask import Blueprint, request
+from flask import Blueprint, Response, g, request, stream_with_context
+from werkzeug.exceptions import NotFound
 from WebServerCore.command_factory import CommandFactorySingleton
 from WebServerCore.handler import handler_get, handler_post, handler_put
 
+import simulator_api.utils.logger as logging
+from simulator_api.celery_tasks.tasks import celery_instance, open_connections
+from simulator_api.celery_tasks.health import health_report
+from simulator_api.celery_tasks.notifications import get_listener
+from simulator_api.commands.topic_echo import TopicEcho
+from simulator_api.commands.topic_publish_bulk import TopicPublishBulk
+from simulator_api.utils.metrics import (
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    command_names,
+    generate_metrics,
+)
+from simulator_api.utils.config import get_config
+
 # The handler functions below expose the endpoints.
 # They are necessary for the application to work, in this case, with the Flask framework.
 # The logic for each function is implemented by its namesake on the factory side.
 
 commands = Blueprint("commands", __name__)
 
+# Seconds the warm-up waits for the broker
+WARM_UP_TIMEOUT = 10
+# Set once the process is warmed up
+warmed_up = threading.Event()
+
+# Endpoints answering with the status of tasks
+STATUS_ENDPOINTS = {
+    "commands.get_status_call",
+    "commands.get_status_call_no_version",
+    "commands.get_call",
+    "commands.get_call_no_version",
+}
+
 
 def discovery():
-    """Lazy instantiation of the commands discovery. Commands will be discovered on first call."""
+    """Instantiation of the commands discovery. Commands are discovered once."""
     CommandFactorySingleton.discover_commands(__file__)
 
 
@@ -29,12 +60,90 @@ def hello():
     }
 
 
-@commands.before_app_first_request
-def flask_discovery():
-    """Lazy instantiation of the commands discovery. Commands will be discovered on first call."""
+@commands.record_once
+def flask_discovery(_state):
+    """Eager instantiation of the commands discovery, when the blueprint is registered."""
     discovery()
 
 
+def warm_up(timeout=WARM_UP_TIMEOUT):
+    """Prepares the process to serve requests, so the first one is as fast as the next ones.
+
+    Loads the configuration and opens the connections to the databases and the broker. Called
+    by the web server before the process accepts requests.
+
+    Args:
+        timeout (float, optional): Maximum number of seconds to wait for the broker.
+
+    Returns:
+        bool: True if the process is connected to the broker
+    """
+
+    start = time.monotonic()
+    get_config()
+    try:
+        connected = open_connections(timeout)
+    except Exception:
+        # Connections are opened again by the first requests needing them
+        logging.exception("Failed to open the connections of the web server")
+        connected = False
+    warmed_up.set()
+    logging.info(f"Web server warmed up in {time.monotonic() - start:.2f}s")
+    return connected
+
+
+def request_command():
+    """Returns the command of the current request, as a bounded metric label."""
+
+    args = request.view_args or {}
+    for arg in ("get_method", "post_method", "put_method"):
+        if arg in args:
+            return args[arg] if args[arg] in command_names() else "unknown"
+    # Dedicated routes, e.g. the topic-echo stream
+    return request.endpoint.split(".")[-1] if request.endpoint else "unknown"
+
+
+@commands.before_app_request
+def start_request_timer():
+    """Starts measuring the duration of the request"""
+    g.request_start = time.monotonic()
+    REQUESTS_IN_FLIGHT.inc()
+
+
+@commands.teardown_app_request
+def observe_request_duration(_exception=None):
+    """Records the duration of the request, until the end of the stream for streamed responses"""
+    start = g.pop("request_start", None)
+    if start is None:
+        return
+    REQUESTS_IN_FLIGHT.dec()
+    REQUEST_LATENCY.labels(request_command(), request.method).observe(time.monotonic() - start)
+
+
+@commands.route("/metrics", methods=["GET"])
+def metrics():
+    """Exposes the metrics of the web server and the celery workers in the Prometheus text format"""
+    data, content_type = generate_metrics()
+    return Response(data, content_type=content_type)
+
+
+@commands.route("/ready", methods=["GET"])
+def ready():
+    """Readiness of the process, ready once warmed up and listening to the task completions"""
+    if not warmed_up.is_set():
+        return {'status': "warming up"}, 503
+    if not get_listener(celery_instance).ready.is_set():
+        return {'status': "not connected to the broker"}, 503
+    return {'status': "ready"}, 200
+
+
+@commands.route("/health", methods=["GET"])
+def health():
+    """Health of the broker and the celery workers, from the heartbeats cached by the process"""
+    report = health_report(get_listener(celery_instance))
+    return report, 200 if report['status'] == "healthy" else 503
+
+
 @commands.route("/api/v<version>/<get_method>", methods=["GET"])
 def get_call(version, get_method):
     """Forward the http get calls to the WebServer core handler to take advantage of the framework functionalities"""
@@ -47,6 +156,102 @@ def get_call_no_version(get_method):
     return handler_get(get_method, request)
 
 
+def stream_topic_echo(version="latest"):
+    """Streams the messages of a topic as Server-Sent Events"""
+
+    handler = getattr(TopicEcho(), f"stream_execute_{version}", None)
+    if handler is None:
+        raise NotFound(f"Version {version} of topic-echo stream not found.")
+
+    events = handler(request.args.to_dict())
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@commands.route("/api/v<version>/topic-echo/stream", methods=["GET"])
+def stream_call(version):
+    """Stream the messages of a topic, the connection is held open while messages are pushed"""
+    return stream_topic_echo(f"v{version}")
+
+
+@commands.route("/api/topic-echo/stream", methods=["GET"])
+def stream_call_no_version():
+    """Stream the messages of a topic, the connection is held open while messages are pushed"""
+    return stream_topic_echo()
+
+
+def read_lines(stream, sock, max_duration):
+    """Yields the lines of a request body read less than max_duration seconds after the first.
+
+    Each read of the client socket waits at most until the deadline, so a client holding the
+    body open without sending lines does not hold the request thread.
+
+    Args:
+        stream (file): Stream of the request body
+        sock (socket): Socket of the client, None if not served by gunicorn
+        max_duration (float): Maximum number of seconds spent reading the body
+    """
+
+    deadline = time.monotonic() + max_duration
+    while time.monotonic() < deadline:
+        if sock is None:
+            line = stream.readline()
+        else:
+            # Only bounds the reads, the acks are written between them
+            sock.settimeout(max(deadline - time.monotonic(), 0.001))
+            try:
+                line = stream.readline()
+            except socket.timeout:
+                break
+            finally:
+                sock.settimeout(None)
+        if not line:
+            return
+        yield line
+
+    if sock is not None:
+        # The rest of the body is not read, so the connection is not kept alive
+        try:
+            sock.shutdown(socket.SHUT_RD)
+        except OSError:
+            logging.debug("Connection closed by the client before the end of its body")
+
+
+def stream_topic_publish(version="latest"):
+    """Publishes the NDJSON messages of the request body as they arrive, streaming their acks"""
+
+    handler = getattr(TopicPublishBulk(), f"stream_execute_{version}", None)
+    if handler is None:
+        raise NotFound(f"Version {version} of topic-publish-bulk stream not found.")
+
+    lines = read_lines(
+        request.stream,
+        request.environ.get("gunicorn.socket"),
+        get_config().transport.max_stream_duration,
+    )
+    acks = handler(request.args.to_dict(), lines)
+    return Response(
+        stream_with_context(acks),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@commands.route("/api/v<version>/topic-publish-bulk/stream", methods=["POST"])
+def stream_publish_call(version):
+    """Publish a stream of messages, the ack of each message is streamed back as it completes"""
+    return stream_topic_publish(f"v{version}")
+
+
+@commands.route("/api/topic-publish-bulk/stream", methods=["POST"])
+def stream_publish_call_no_version():
+    """Publish a stream of messages, the ack of each message is streamed back as it completes"""
+    return stream_topic_publish()
+
+
 @commands.route("/api/v<version>/<get_method>/<task_id>", methods=["GET"])
 def get_status_call(version, get_method, task_id):
     """Forward the http get calls to the WebServer core handler to take advantage of the framework functionalities"""
@@ -83,6 +288,25 @@ def put_call_no_version(put_method):
     return handler_put(put_method, request)
 
 
+@commands.after_request
+def conditional_status(response):
+    """Tags the task status responses with an ETag, answering 304 if the client has this version.
+
+    The ETag is the hash of the status, which changes with every state or progress update
+    of the task, so polling an unchanged task does not transfer its status again.
+    """
+
+    if (
+        request.method == "GET"
+        and request.endpoint in STATUS_ENDPOINTS
+        and response.status_code == 200
+        and not response.is_streamed
+    ):
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
 # Test function.
 @commands.route("/")
 def flask_hello():
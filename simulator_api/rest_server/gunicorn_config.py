@@ -0,0 +1,43 @@
+"""Gunicorn configuration of the simulator api web server.
+ The worker model is set by the [server] section of the configuration file. By default, the
+ app is preloaded once by the master and served by one threaded worker per available core,
+ each thread handling a request, so requests blocked on the broker, the databases or a long
+ poll do not hold the others.
+ Usage: gunicorn -c python:simulator_api.rest_server.gunicorn_config simulator_api.entrypoint:app"""
+
+from simulator_api.utils.config import load_config
+from simulator_api.utils.utils import available_cores
+
+# Workers started by default, the requests of a worker being served by its threads
+MAX_AUTO_WORKERS = 4
+
+
+_server = load_config().server
+
+bind = _server.bind
+worker_class = _server.worker_class
+workers = _server.workers or min(available_cores(), MAX_AUTO_WORKERS)
+# Gunicorn replaces sync workers by threaded ones when given several threads
+threads = _server.threads if _server.worker_class == "gthread" else 1
+timeout = _server.timeout
+preload_app = _server.preload
+
+
+def post_worker_init(worker):
+    """Warms up every worker process before it accepts requests.
+
+    The connections are opened by each worker, never by the master preloading the app, so they
+    are not shared by the forked processes.
+    """
+
+    from simulator_api.rest_server.exposed_methods import warm_up
+
+    warm_up()
+
+
+def child_exit(server, worker):
+    """Removes the live metrics of an exited worker."""
+
+    from simulator_api.utils.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
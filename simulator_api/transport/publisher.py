@@ -0,0 +1,104 @@
+"""Module that provides the publishes to Ignition topics through the `ign topic -p` CLI.
+ Fortress ships no Python bindings of gz-transport, so every publish runs a CLI process:
+ the repeated publishes of a burst run in a single shell and the publishes of a stream
+ overlap up to a maximum number of processes, so their startup times do not add up."""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from simulator_api.utils.utils import container_exec_cmd
+
+PUBLISH_CMD = 'ign topic -p "{message}" -t {topic} --msgtype {msgtype}'
+MAX_IN_FLIGHT = 8
+
+
+def _ack(index, task_json):
+    ack = {'index': index}
+    ack.update({key: value for key, value in task_json.items() if key != 'command'})
+    return ack
+
+
+def _completed_acks(futures, timeout=None):
+    done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+    for future in sorted(done, key=futures.get):
+        yield _ack(futures.pop(future), future.result())
+
+
+def publish_command(topic, message, msgtype):
+    """Returns the CLI command publishing a message on a topic."""
+    return PUBLISH_CMD.format(message=message, topic=topic, msgtype=msgtype)
+
+
+def publish(topic, message, msgtype, count=1, interval=0):
+    """Publishes a message on a topic one or several times.
+
+    The publishes of a burst run in a single shell, each one started interval seconds
+    after the previous, so that their startup and discovery times overlap.
+
+    Args:
+        topic (string): Name of the topic from which to publish a message
+        message (string): Message to publish
+        msgtype (string): Type of message being published
+        count (int, optional): Number of times to publish the message. Defaults to 1.
+        interval (float, optional): Seconds between two publishes. Defaults to 0.
+
+    Returns:
+        task_json (dict): Task json specifying the status of the publish.
+    """
+
+    cmd = publish_command(topic, message, msgtype)
+    if count <= 1:
+        return container_exec_cmd(cmd, timeout=None)
+
+    burst_cmd = (
+        f"pids=(); for _ in $(seq {count}); do {cmd} & pids+=($!); sleep {interval}; done; "
+        'rc=0; for pid in "${pids[@]}"; do wait $pid || rc=$?; done; exit $rc'
+    )
+    task_json = container_exec_cmd(burst_cmd, timeout=None)
+    task_json['command'] = cmd
+    return task_json
+
+
+def publish_stream(topic, messages, msgtype, rate=None, max_in_flight=MAX_IN_FLIGHT, deadline=None):
+    """Publishes a stream of messages on a topic, paced at a target rate.
+
+    Message i is published i / rate seconds after the first one, with at most
+    max_in_flight publishes running at the same time, so that slow CLI publishes
+    overlap instead of lowering the rate.
+
+    Args:
+        topic (string): Name of the topic from which to publish the messages
+        messages (iterable): Messages to publish, consumed as they are published
+        msgtype (string): Type of message being published
+        rate (float, optional): Target number of messages per second. Defaults to None
+          (as fast as possible).
+        max_in_flight (int, optional): Maximum number of publishes running at the same time.
+        deadline (float, optional): time.monotonic() after which no message is published, the
+          stream ending with the publishes already started. Defaults to None (no deadline).
+
+    Yields:
+        ack (dict): Status of each publish with the index of its message, in completion order.
+    """
+
+    futures = {}
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for index, message in enumerate(messages):
+            scheduled = start + index / rate if rate else start
+            if deadline is not None and scheduled > deadline:
+                break
+            # Report the completed publishes while waiting for the schedule or a free slot
+            while True:
+                delay = scheduled - time.monotonic()
+                if delay <= 0 and len(futures) < max_in_flight:
+                    break
+                if not futures:
+                    time.sleep(delay)
+                    continue
+                timeout = max(delay, 0) if len(futures) < max_in_flight else None
+                yield from _completed_acks(futures, timeout=timeout)
+            futures[executor.submit(publish, topic, message, msgtype)] = index
+
+        while futures:
+            yield from _completed_acks(futures)
@@ -0,0 +1,300 @@
+"""Module that provides a persistent subscriber to Ignition topics.
+ Every subscribed topic is kept open by a long-lived `ign topic -e` process and the
+ received messages are held in a ring buffer, so echo requests are served from the
+ buffer (or wait on it) instead of starting a new process each time."""
+
+import os
+import atexit
+import signal
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+
+import simulator_api.utils.logger as logging
+from simulator_api.utils.process import per_process
+
+# Command reported in the task json, kept equal to the one of the CLI backend
+ECHO_CMD = "ign topic -e -n 1 -t {topic}"
+
+
+class TopicSubscription:
+    """Long-lived subscription to a single topic backed by a streaming `ign topic -e` process"""
+
+    def __init__(self, topic, buffer_size=10, executable="ign"):
+        self.topic = topic
+        self.executable = executable
+        # Ring buffer of (reception time, message) tuples
+        self.messages = deque(maxlen=buffer_size)
+        # Total number of messages received, used by waiters as a sequence number
+        self.received = 0
+        self.last_used = time.monotonic()
+        self.condition = threading.Condition()
+        self._errors = deque(maxlen=20)
+        self._process = None
+        self._error_reader = None
+
+    def start(self):
+        """Starts the echo process and the threads reading its output."""
+
+        self._process = subprocess.Popen(
+            [self.executable, "topic", "-e", "-t", self.topic],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        threading.Thread(target=self._read_messages, daemon=True).start()
+        self._error_reader = threading.Thread(target=self._read_errors, daemon=True)
+        self._error_reader.start()
+        logging.debug(f"Subscribed to topic {self.topic} (pid {self._process.pid})")
+
+    def _read_messages(self):
+        # `ign topic -e` prints every message followed by an empty line
+        lines = []
+        for line in iter(self._process.stdout.readline, b""):
+            line = line.decode(errors="replace").rstrip("\n")
+            if line:
+                lines.append(line)
+                continue
+            with self.condition:
+                self.messages.append((time.monotonic(), "\n".join(lines)))
+                self.received += 1
+                self.condition.notify_all()
+            lines = []
+
+        self._process.wait()
+        with self.condition:
+            self.condition.notify_all()
+
+    def _read_errors(self):
+        for line in iter(self._process.stderr.readline, b""):
+            self._errors.append(line.decode(errors="replace"))
+
+    @property
+    def alive(self):
+        """Whether the echo process is still running."""
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def exitcode(self):
+        """Exitcode of the echo process, None while it is running."""
+        return None if self._process is None else self._process.poll()
+
+    @property
+    def errors(self):
+        """Last lines written by the echo process on stderr."""
+        if not self.alive and self._error_reader is not None:
+            self._error_reader.join(timeout=1)
+        return "".join(self._errors)
+
+    def wait_message(self, timeout, max_age=0):
+        """Waits for a message on the topic.
+
+        Args:
+            timeout (float): Maximum time to wait for a message in seconds.
+            max_age (float, optional): A buffered message received less than max_age seconds
+              ago is returned right away. Defaults to 0.
+
+        Returns:
+            message (string): Received message, None if the timeout expired or the process died.
+        """
+
+        self.last_used = time.monotonic()
+        deadline = self.last_used + (timeout if timeout is not None else float("inf"))
+
+        with self.condition:
+            if self.messages and self.last_used - self.messages[-1][0] <= max_age:
+                return self.messages[-1][1]
+
+            start = self.received
+            while self.received == start and self.alive:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+            return self.messages[-1][1] if self.received != start else None
+
+    def iter_messages(self, max_duration=None, min_interval=0):
+        """Yields the messages received on the topic from now on.
+
+        Args:
+            max_duration (float, optional): Seconds after which the iteration stops.
+              Defaults to None (until the echo process exits).
+            min_interval (float, optional): Messages received less than min_interval seconds
+              after the previous yielded message are dropped. Defaults to 0.
+
+        Yields:
+            message (string): Received message
+        """
+
+        now = time.monotonic()
+        deadline = now + (max_duration if max_duration is not None else float("inf"))
+        last_yield = None
+        with self.condition:
+            seen = self.received
+
+        while True:
+            with self.condition:
+                while self.received == seen and self.alive:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self.condition.wait(remaining)
+                if self.received == seen:
+                    return
+                # Messages overwritten in the ring buffer meanwhile are lost
+                new = list(self.messages)[-min(self.received - seen, len(self.messages)) :]
+                seen = self.received
+
+            self.last_used = time.monotonic()
+            for received_at, message in new:
+                if last_yield is not None and received_at - last_yield < min_interval:
+                    continue
+                last_yield = received_at
+                yield message
+
+            if time.monotonic() >= deadline:
+                return
+
+    def stop(self):
+        """Kills the echo process group."""
+
+        if self.alive:
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if self._process is not None:
+            self._process.wait()
+
+
+class SubscriberDaemon:
+    """Keeps subscriptions to Ignition topics open and serves echo requests from their buffers"""
+
+    def __init__(self, buffer_size=10, idle_timeout=300, executable="ign"):
+        self.buffer_size = buffer_size
+        self.idle_timeout = idle_timeout
+        self.executable = executable
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._reaper = threading.Thread(target=self._evict_idle, daemon=True)
+        self._reaper.start()
+
+    def subscription(self, topic):
+        """Returns the subscription of a topic, starting it (again) if needed.
+
+        Args:
+            topic (string): Name of the topic
+
+        Returns:
+            TopicSubscription: Running subscription of the topic
+        """
+
+        with self._lock:
+            sub = self._subscriptions.get(topic)
+            if sub is None or not sub.alive:
+                sub = TopicSubscription(topic, self.buffer_size, self.executable)
+                sub.start()
+                self._subscriptions[topic] = sub
+            return sub
+
+    def echo(self, topic, timeout, max_age=0):
+        """Echoes one message of a topic.
+
+        Args:
+            topic (string): Name of the topic to echo
+            timeout (float): Duration of echo in seconds.
+            max_age (float, optional): Maximum age in seconds of a buffered message to be
+              served instead of waiting for a new one. Defaults to 0.
+
+        Returns:
+            task_json (dict): Task json specifying the status of the echo, with the same
+              format as the one returned by container_exec_cmd.
+        """
+
+        cmd = ECHO_CMD.format(topic=topic)
+        sub = self.subscription(topic)
+        message = sub.wait_message(timeout, max_age=max_age)
+
+        task_json = {'command': cmd, 'status': 'SUCCESS'}
+        if message is not None:
+            logging.debug(f"The subscription to '{topic}' received: {message}.")
+        elif sub.alive:
+            task_json['status'] = 'TIMEOUT'
+            logging.debug(f"The subscription to '{topic}' timed out.")
+        else:
+            task_json['status'] = 'ERROR'
+            task_json['exitcode'] = sub.exitcode
+            task_json['output'] = sub.errors
+            logging.debug(f"The subscription to '{topic}' exited: {sub.exitcode}.")
+            # Drop the dead subscription so that next request retries it
+            with self._lock:
+                if self._subscriptions.get(topic) is sub:
+                    del self._subscriptions[topic]
+
+        return task_json
+
+    def _evict_idle(self):
+        while True:
+            time.sleep(max(1, min(self.idle_timeout, 30)))
+            now = time.monotonic()
+            with self._lock:
+                idle = [
+                    topic
+                    for topic, sub in self._subscriptions.items()
+                    if now - sub.last_used > self.idle_timeout or not sub.alive
+                ]
+                evicted = [self._subscriptions.pop(topic) for topic in idle]
+            for sub in evicted:
+                logging.debug(f"Closing idle subscription to topic {sub.topic}")
+                sub.stop()
+
+    def stop(self):
+        """Closes all the subscriptions."""
+
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+            self._subscriptions.clear()
+        for sub in subscriptions:
+            sub.stop()
+
+
+_daemon = per_process(SubscriberDaemon)
+
+
+@atexit.register
+def stop_subscriber():
+    """Closes the subscriptions of the current process if its daemon was created.
+
+    The echo processes run in their own session and outlive a killed worker, so the celery
+    pool processes, which exit without running the atexit handlers, call it explicitly.
+    """
+
+    # Only the process that created it releases it, not its forked children
+    daemon = _daemon.current()
+    if daemon is not None:
+        daemon.stop()
+
+
+def subscriber_available(executable="ign"):
+    """Whether the Ignition CLI needed by the subscriber is installed."""
+    return shutil.which(executable) is not None
+
+
+def get_subscriber(buffer_size=10, idle_timeout=300):
+    """Returns the subscriber daemon of the current process, creating it on first call.
+
+    The daemon is recreated after a fork (e.g. in the celery pool processes), since its
+    threads and processes are not inherited by the child.
+
+    Args:
+        buffer_size (int, optional): Number of messages kept per topic. Defaults to 10.
+        idle_timeout (int, optional): Seconds after which an unused subscription is closed.
+
+    Returns:
+        SubscriberDaemon: Subscriber daemon of the process
+    """
+
+    return _daemon(buffer_size=buffer_size, idle_timeout=idle_timeout)
@@ -0,0 +1,100 @@
+"""Module that provides an asyncio based engine to execute shell commands.
+ Outputs are read incrementally and capped in size, and the whole process group of a
+ command is killed on timeout while keeping the output produced until then."""
+
+import os
+import signal
+import asyncio
+
+import simulator_api.utils.logger as logging
+
+# Maximum number of bytes kept from each of stdout and stderr
+MAX_OUTPUT_SIZE = 64 * 1024
+CHUNK_SIZE = 4096
+
+
+class CommandResult:
+    """Result of the execution of a shell command"""
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.timeout_flag = False
+        self.exitcode = None
+        self.stdout = bytearray()
+        self.stderr = bytearray()
+        self.truncated = False
+
+    @property
+    def output(self):
+        """Stdout of a successful command, stdout and stderr otherwise."""
+        if self.exitcode == 0 and not self.timeout_flag:
+            return bytes(self.stdout)
+        return bytes(self.stdout + self.stderr)
+
+
+async def _read_stream(stream, buffer, result, max_output):
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        remaining = max_output - len(buffer)
+        if len(chunk) > remaining:
+            result.truncated = True
+        if remaining > 0:
+            buffer += chunk[:remaining]
+
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def run_command(cmd, timeout=None, max_output=MAX_OUTPUT_SIZE):
+    """Executes a shell command in its own process group.
+
+    Args:
+        cmd (string): Command to be executed
+        timeout (float, optional): Duration after which the process group is killed.
+          Defaults to None.
+        max_output (int, optional): Maximum number of bytes kept from each output stream.
+
+    Returns:
+        CommandResult: Result of the command, with the output read until the timeout.
+    """
+
+    result = CommandResult(cmd)
+    process = await asyncio.create_subprocess_exec(
+        "/bin/bash",
+        "-c",
+        cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                _read_stream(process.stdout, result.stdout, result, max_output),
+                _read_stream(process.stderr, result.stderr, result, max_output),
+                process.wait(),
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        result.timeout_flag = True
+        logging.debug(f"The command '{cmd}' timed out, killing its process group.")
+    finally:
+        # Kill the group on timeout or cancellation, and the grandchildren outliving the shell
+        _kill_group(process)
+        await process.wait()
+
+    result.exitcode = process.returncode
+    return result
+
+
+def execute(cmd, timeout=None, max_output=MAX_OUTPUT_SIZE):
+    """Synchronous wrapper of run_command, runs the command in a new event loop."""
+    return asyncio.run(run_command(cmd, timeout=timeout, max_output=max_output))
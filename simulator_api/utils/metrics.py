@@ -0,0 +1,134 @@
+"""Module that provides the Prometheus metrics of the simulator api.
+ Metrics are recorded by the web server and the celery worker processes. When the
+ PROMETHEUS_MULTIPROC_DIR environment variable is set, each process writes its metrics to
+ memory mapped files of this shared directory, aggregated when the metrics are exposed."""
+
+import os
+import pkgutil
+from functools import lru_cache
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Buckets from 5ms to 30s, the maximum duration of a request or an echo
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30)
+
+REQUEST_LATENCY = Histogram(
+    "simulator_api_request_duration_seconds",
+    "Duration of the api requests",
+    ["command", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "simulator_api_requests_in_flight",
+    "Number of api requests being handled",
+    multiprocess_mode="livesum",
+)
+TASK_QUEUE_WAIT = Histogram(
+    "simulator_api_task_queue_wait_seconds",
+    "Duration between the publication of a celery task and the start of its execution",
+    ["task"],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_RUN_TIME = Histogram(
+    "simulator_api_task_run_seconds",
+    "Duration of the execution of a celery task",
+    ["task", "state"],
+    buckets=LATENCY_BUCKETS,
+)
+TASKS_IN_FLIGHT = Gauge(
+    "simulator_api_tasks_in_flight",
+    "Number of celery tasks being executed",
+    ["task"],
+    multiprocess_mode="livesum",
+)
+SUBPROCESS_DURATION = Histogram(
+    "simulator_api_subprocess_duration_seconds",
+    "Duration of the shell commands executed in the container",
+    ["status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+RESULT_CACHE_LOOKUPS = Counter(
+    "simulator_api_result_cache_lookups",
+    "Number of lookups of the completed task results in the result cache of the api",
+    ["result"],
+)
+DATABASE_PRUNED_ROWS = Counter(
+    "simulator_api_database_pruned_rows",
+    "Number of rows deleted from the sqlite databases by the retention policy",
+    ["database"],
+)
+
+
+class DatabaseSizeCollector:
+    """Collects the size of the sqlite databases of the celery tasks when metrics are exposed"""
+
+    NAME = "simulator_api_database_size_bytes"
+    DOCUMENTATION = "Size on disk of the sqlite databases, with their write-ahead log"
+
+    def describe(self):
+        return [GaugeMetricFamily(self.NAME, self.DOCUMENTATION, labels=["database"])]
+
+    def collect(self):
+        from simulator_api.celery_tasks.retention import database_paths, database_size
+
+        size = GaugeMetricFamily(self.NAME, self.DOCUMENTATION, labels=["database"])
+        for database, path in database_paths().items():
+            size.add_metric([database], database_size(path))
+        yield size
+
+
+REGISTRY.register(DatabaseSizeCollector())
+
+
+@lru_cache(maxsize=None)
+def command_names():
+    """Returns the names of the commands of the api, used as bounded metric labels."""
+
+    from simulator_api import commands
+
+    names = {module.name.replace("_", "-") for module in pkgutil.iter_modules(commands.__path__)}
+    # Command provided by WebServerCore
+    names.add("get-capabilities")
+    return names
+
+
+def multiprocess_enabled():
+    """Whether the metrics are shared by several processes."""
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def generate_metrics():
+    """Returns the metrics of all the processes in the Prometheus text format.
+
+    Returns:
+        data (bytes): Metrics in the Prometheus text format
+        content_type (string): Content type of the Prometheus text format
+    """
+
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(DatabaseSizeCollector())
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Removes the live gauges of an exited process from the shared metrics."""
+
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,41 @@
+"""Module that provides the objects created once per process.
+ Threads, child processes and connections are not inherited by a forked process (e.g. the
+ celery pool processes and the gunicorn workers), so such objects are created again by the
+ first call made in each process."""
+
+import os
+import threading
+
+
+class per_process:
+    """Instance of a factory created on first call in each process"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        # Pid of the process that created the instance, and the instance
+        self._owned = (None, None)
+        self._lock = threading.Lock()
+        # The lock may be held by another thread of the parent when the process forks
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        """Returns the instance of the current process, created with the given arguments if
+        this is the first call of the process."""
+
+        pid, instance = self._owned
+        if pid != os.getpid():
+            with self._lock:
+                pid, instance = self._owned
+                if pid != os.getpid():
+                    instance = self.factory(*args, **kwargs)
+                    self._owned = (os.getpid(), instance)
+        return instance
+
+    def current(self):
+        """Returns the instance of the current process, None if it was not created yet."""
+
+        pid, instance = self._owned
+        return instance if pid == os.getpid() else None
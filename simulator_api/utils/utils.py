@@ -1,13 +1,35 @@
 import os
-import subprocess
+import time
 import configparser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from pathlib import Path
+from urllib.parse import urlparse
+from werkzeug.exceptions import BadRequest
 import simulator_api.utils.logger as logging
+from simulator_api.utils.executor import execute
+from simulator_api.utils.metrics import SUBPROCESS_DURATION
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# Status and time of the last shell command run by the process, and time of its last success
+last_subprocess = {'status': None, 'time': None, 'success_time': None}
+
+
+def config_path():
+    """Returns the path of the configuration file"""
+
+    path = Path(__file__)
+    ROOT_DIR = os.path.dirname(path.parent.absolute())
+    return os.path.join(ROOT_DIR, "config.ini")
 
 
 def parse_config():
     """Function to parse configuration file
 
+    Raises:
+        ValueError: The file is not a valid configuration file or misses a mandatory variable.
+
     Returns:
         configParser: Configuration object containing all config variables
     """
@@ -15,21 +37,94 @@ def parse_config():
     cfg = configparser.ConfigParser()
 
     # Read the configuration file
-    path = Path(__file__)
-    ROOT_DIR = os.path.dirname(path.parent.absolute())
-    config_path = os.path.join(ROOT_DIR, "config.ini")
-    logging.debug(f"Configuration file : {config_path}")
-    cfg.read(config_path)
+    path = config_path()
+    logging.debug(f"Configuration file : {path}")
+    try:
+        cfg.read(path)
+    except configparser.Error as e:
+        raise ValueError(f"Not valid configuration file {path}: {e}")
 
     # Check mandatory configuration variables
     mandatory_vars = ["topic_to_echo", "topic_to_publish", "ignition_base_topics", "world_name"]
     for var in mandatory_vars:
-        if cfg.get("communication", var) is None:
+        if cfg.get("communication", var, fallback=None) is None:
             raise ValueError(f"Missing mandatory configuration variable: {var}")
 
     return cfg
 
 
+def available_cores():
+    """Returns the number of cores the process may run on"""
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def parse_wait(url_params, max_wait):
+    """Parses the optional 'wait' url parameter of the task status requests.
+
+    Args:
+        url_params (dict): url parameters of the request
+        max_wait (float): maximum number of seconds a request can wait
+
+    Returns:
+        float: number of seconds to wait for the task completion, 0 to not wait
+    """
+
+    wait = (url_params or {}).get("wait")
+    if wait is None or wait == "":
+        return 0
+    try:
+        wait = float(wait)
+    except ValueError:
+        raise BadRequest(f"Not valid wait: {wait}")
+    if not 0 <= wait <= max_wait:
+        raise BadRequest(f"Wait negative or larger than maximum allowed ({max_wait}): {wait}")
+    return wait
+
+
+def callback_headers(url_params):
+    """Parses the optional 'callback' url parameter of the task requests.
+
+    Args:
+        url_params (dict): url parameters of the request
+
+    Returns:
+        dict: task message headers holding the 'callback_url' receiving the task result, empty
+          if no callback was requested
+    """
+
+    callback = (url_params or {}).get("callback")
+    if callback is None or callback == "":
+        return {}
+    url = urlparse(callback)
+    if url.scheme not in ("http", "https") or not url.netloc:
+        raise BadRequest(f"Not valid callback url: {callback}")
+    return {'callback_url': callback}
+
+
+def idempotency_key():
+    """Parses the optional Idempotency-Key header of the current request.
+
+    Returns:
+        string: Idempotency key of the request, None if the header is missing or out of a request
+    """
+
+    # Only the web server handles requests
+    from flask import has_request_context, request
+
+    if not has_request_context():
+        return None
+    key = request.headers.get("Idempotency-Key")
+    if key is None or key == "":
+        return None
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise BadRequest(f"Idempotency key longer than {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+    return key
+
+
 def container_exec_cmd(cmd, timeout=None, checklist=None):
     """Executes a shell command, evaluates the response and generates a status
 
@@ -44,9 +139,49 @@ def container_exec_cmd(cmd, timeout=None, checklist=None):
         task_json (json): dictionary describing the operation in detail
     """
 
+    start = time.monotonic()
+    timeout_flag, exitcode, result = subprocess_timeout_compliant(cmd, timeout=timeout)
+    task_json = evaluate_cmd(cmd, timeout_flag, exitcode, result)
+    SUBPROCESS_DURATION.labels(task_json['status']).observe(time.monotonic() - start)
+    record_subprocess(task_json['status'])
+
+    if checklist is not None:
+        checklist.append(task_json)
+        return checklist
+
+    return task_json
+
+
+def record_subprocess(status):
+    """Records the status of the last shell command run by the process, reported by the health.
+
+    Args:
+        status (string): state tag 'SUCCESS', 'ERROR' or 'TIMEOUT'
+    """
+
+    now = time.time()
+    last_subprocess.update(
+        status=status,
+        time=now,
+        success_time=now if status == 'SUCCESS' else last_subprocess['success_time'],
+    )
+
+
+def evaluate_cmd(cmd, timeout_flag, exitcode, result):
+    """Evaluates the result of a shell command and generates its status
+
+    Args:
+        cmd (string): Command run.
+        timeout_flag (bool): Flag to identify if the command has timed out.
+        exitcode (int): Exitcode of the command.
+        result (bytes): Output of the command.
+
+    Returns:
+        task_json (json): dictionary describing the operation in detail
+    """
+
     task_status = 'SUCCESS'
 
-    timeout_flag, exitcode, result = subprocess_timeout_compliant(cmd, timeout=timeout)
     if timeout_flag:
         task_status = 'TIMEOUT'
         message = f"The command '{cmd}' timed out. Output: {result}."
@@ -64,11 +199,9 @@ def container_exec_cmd(cmd, timeout=None, checklist=None):
     task_json = {'command': cmd, 'status': task_status}
     if result and exitcode != 0:
         task_json['exitcode'] = exitcode
-        task_json['output'] = result.decode()
-
-    if checklist is not None:
-        checklist.append(task_json)
-        return checklist
+        task_json['output'] = result.decode(errors="replace")
+    elif result and timeout_flag:
+        task_json['output'] = result.decode(errors="replace")
 
     return task_json
 
@@ -83,26 +216,75 @@ def subprocess_timeout_compliant(cmd, timeout=None):
     Returns:
         timeout_flag (bool): Flag to identify if a process has timed out.
         exitcode (int): Exitcode of the process.
-        result (string): Stdout output of the process.
+        result (string): Stdout output of the process, with stderr if it failed or timed out.
     """
 
+    # Compliant: makes sure to terminate the whole process group when the timeout expires.
+    cmd_ret = execute(cmd, timeout=timeout)
+
+    if cmd_ret.timeout_flag:
+        return True, 0, cmd_ret.output
+
+    return False, cmd_ret.exitcode, cmd_ret.output
+
+
+def _run_check(command, check):
+    """Runs a check, reported as an error if it raises instead of returning its task json."""
+
     try:
-        # Compliant: makes sure to terminate the child process when
-        # the timeout expires.
-
-        cmd_ret = subprocess.run(
-            cmd,
-            shell=True,
-            executable="/bin/bash",
-            check=True,
-            capture_output=True,
-            timeout=timeout,
-        )
+        return check()
+    except Exception as e:
+        logging.exception(f"The check of the command '{command}' failed")
+        return {'command': command, 'status': 'ERROR', 'output': str(e)}
+
 
-    except subprocess.TimeoutExpired:
-        return True, 0, None
+def run_checks(checks, on_progress=None, concurrent=True, global_timeout=None, max_workers=None):
+    """Runs the checks of a checklist, sequentially or concurrently
 
-    except subprocess.CalledProcessError as e:
-        return False, e.returncode, e.stdout + e.stderr
+    The checklist keeps the order of the checks whatever the order in which they complete.
+
+    Args:
+        checks (list): list of (command, check) tuples, where check is a callable returning
+          the task json of the command. A check raising an exception is reported as an error.
+        on_progress (callable, optional): Called with the checklist of the completed checks
+          every time a check completes. Defaults to None.
+        concurrent (bool, optional): Run all the checks at the same time. Defaults to True.
+        global_timeout (int, optional): Duration after which the checks still running are
+          reported as timed out, only used in concurrent mode. Defaults to None.
+        max_workers (int, optional): Maximum number of checks running at the same time in
+          concurrent mode. Defaults to None (all the checks).
+
+    Returns:
+        checklist (list): list of task status, in the order of the checks
+    """
+
+    results = [None] * len(checks)
+
+    def report():
+        if on_progress is not None:
+            on_progress([result for result in results if result is not None])
+
+    if not concurrent or len(checks) <= 1:
+        for i, (command, check) in enumerate(checks):
+            results[i] = _run_check(command, check)
+            report()
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers or len(checks), len(checks)))
+    futures = {
+        executor.submit(_run_check, command, check): i for i, (command, check) in enumerate(checks)
+    }
+    try:
+        for future in as_completed(futures, timeout=global_timeout):
+            results[futures[future]] = future.result()
+            report()
+    except FuturesTimeoutError:
+        for i, (command, _) in enumerate(checks):
+            if results[i] is None:
+                logging.debug(f"The command '{command}' did not complete before the deadline.")
+                results[i] = {'command': command, 'status': 'TIMEOUT'}
+    finally:
+        # Do not wait for the checks still running after the deadline
+        executor.shutdown(wait=False)
 
-    return False, cmd_ret.returncode, cmd_ret.stdout
+    return results
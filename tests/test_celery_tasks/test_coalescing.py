@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from simulator_api.celery_tasks.coalescing import TaskCoalescer
+
+
+class FakeListener:
+    """Completion listener notified by the test"""
+
+    def __init__(self):
+        self.watched = {}
+
+    def watch(self, task_id, event):
+        self.watched[task_id] = event
+
+    def unwatch(self, task_id, event):
+        self.watched.pop(task_id, None)
+
+    def complete(self, task_id):
+        self.watched[task_id].set()
+
+
+class TestTaskCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.listener = FakeListener()
+        self.coalescer = TaskCoalescer(self.listener)
+        self.ids = iter(range(100))
+
+    def start(self):
+        task = mock.MagicMock()
+        task.id = str(next(self.ids))
+        return task
+
+    def test_running_task_shared(self):
+        task = self.coalescer.submit(("/a", 5), self.start, max_duration=5)
+        self.assertIs(self.coalescer.submit(("/a", 5), self.start, max_duration=5), task)
+        # Different topic or timeout window
+        self.assertIsNot(self.coalescer.submit(("/b", 5), self.start, max_duration=5), task)
+        self.assertIsNot(self.coalescer.submit(("/a", 2), self.start, max_duration=2), task)
+        self.assertEqual((self.coalescer.started, self.coalescer.coalesced), (3, 1))
+
+    def test_completed_task_fresh(self):
+        task = self.coalescer.submit(("/a", 5), self.start, max_duration=5, freshness=0.2)
+        self.listener.complete(task.id)
+        self.assertIs(
+            self.coalescer.submit(("/a", 5), self.start, max_duration=5, freshness=0.2), task
+        )
+
+        time.sleep(0.3)
+        new_task = self.coalescer.submit(("/a", 5), self.start, max_duration=5, freshness=0.2)
+        self.assertIsNot(new_task, task)
+        self.assertNotIn(task.id, self.listener.watched)
+
+    def test_running_task_deadline(self):
+        task = self.coalescer.submit(("/a", 5), self.start, max_duration=0.1)
+        time.sleep(0.2)
+        self.assertIsNot(self.coalescer.submit(("/a", 5), self.start, max_duration=0.1), task)
+
+    def test_started_outside_lock(self):
+        starting, release = threading.Event(), threading.Event()
+
+        def slow_start():
+            starting.set()
+            self.assertTrue(release.wait(5))
+            return self.start()
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    self.coalescer.submit(("/a", 5), slow_start, max_duration=5)
+                )
+            )
+            for _ in range(4)
+        ]
+        threads[0].start()
+        self.assertTrue(starting.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+
+        # Other requests are not blocked while the task is started
+        other = self.coalescer.submit(("/b", 5), self.start, max_duration=5)
+        self.assertEqual(results, [])
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({task.id for task in results}), 1)
+        self.assertNotEqual(results[0].id, other.id)
+        self.assertEqual((self.coalescer.started, self.coalescer.coalesced), (2, 3))
+
+    def test_start_failure(self):
+        failing = mock.MagicMock(side_effect=ConnectionError())
+        with self.assertRaises(ConnectionError):
+            self.coalescer.submit(("/a", 5), failing, max_duration=5)
+
+        # The failed start is not reused
+        task = self.coalescer.submit(("/a", 5), self.start, max_duration=5)
+        self.assertIn(task.id, self.listener.watched)
+        self.assertEqual((self.coalescer.started, self.coalescer.coalesced), (1, 0))
@@ -0,0 +1,114 @@
+import time
+import unittest
+from unittest import mock
+
+from celery import Celery
+from kombu import Queue
+
+from simulator_api.celery_tasks.health import HeartbeatPublisher, health_report
+from simulator_api.celery_tasks.notifications import (
+    CompletionListener,
+    notify_completion,
+    notify_heartbeat,
+)
+
+QUEUE_DEPTHS = {
+    'probes@host': {'probes': 0, 'celery': 0},
+    'echoes@host': {'echoes': 2},
+    'batches@host': {'batches': 0},
+}
+
+
+class TestHealth(unittest.TestCase):
+    def setUp(self):
+        self.app = Celery('test', broker='memory://')
+        self.listener = CompletionListener(self.app)
+        self.assertTrue(self.listener.ready.wait(5))
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def publish_heartbeats(self, heartbeats=QUEUE_DEPTHS):
+        for hostname, queues in heartbeats.items():
+            notify_heartbeat(self.app, hostname, queues)
+        self.wait_for(lambda: len(self.listener.health_state()[0]) == len(heartbeats))
+
+    def test_healthy(self):
+        self.publish_heartbeats()
+        report = health_report(self.listener)
+        self.assertEqual(report['status'], "healthy")
+        self.assertEqual(report['broker'], "connected")
+        self.assertEqual(report['queues'], {'probes': 0, 'celery': 0, 'echoes': 2, 'batches': 0})
+        self.assertEqual(report['workers']['echoes@host']['queues'], {'echoes': 2})
+        self.assertIsNone(report['last_subprocess'])
+
+    def test_missing_worker(self):
+        self.publish_heartbeats({'probes@host': {'probes': 0}, 'batches@host': {'batches': 0}})
+        report = health_report(self.listener)
+        self.assertEqual(report['status'], "unhealthy")
+        self.assertIsNone(report['queues']['echoes'])
+
+    def test_stale_heartbeat(self):
+        self.publish_heartbeats()
+        report = health_report(self.listener, max_heartbeat_age=0)
+        self.assertEqual(report['status'], "unhealthy")
+        self.assertEqual(set(report['workers']), set(QUEUE_DEPTHS))
+        self.assertIsNone(report['queues']['probes'])
+
+    def test_broker_disconnected(self):
+        self.publish_heartbeats()
+        self.listener.ready.clear()
+        report = health_report(self.listener)
+        self.assertEqual(report['status'], "unhealthy")
+        self.assertEqual(report['broker'], "disconnected")
+
+    def test_last_subprocess(self):
+        now = time.time()
+        older = {'status': "SUCCESS", 'time': now - 10, 'success_time': now - 10}
+        newer = {'status': "FAILURE", 'time': now - 1, 'success_time': now - 10}
+        notify_completion(self.app, "task-1", "SUCCESS", subprocess=newer)
+        notify_completion(self.app, "task-2", "SUCCESS", subprocess=older)
+        notify_completion(self.app, "task-3", "SUCCESS")
+        self.wait_for(lambda: self.listener.health_state()[1] is not None)
+        time.sleep(0.1)
+        last_subprocess = health_report(self.listener)['last_subprocess']
+        self.assertEqual(last_subprocess['status'], "FAILURE")
+        self.assertAlmostEqual(
+            last_subprocess['success_age'] - last_subprocess['age'], 9, delta=0.1
+        )
+
+
+class TestHeartbeatPublisher(unittest.TestCase):
+    def test_publish(self):
+        app = Celery('test', broker='memory://')
+        with app.connection_for_write() as conn:
+            queue = Queue("probes", channel=conn.default_channel)
+            queue.declare()
+            conn.Producer().publish({}, routing_key="probes", declare=[queue])
+
+        listener = CompletionListener(app)
+        self.assertTrue(listener.ready.wait(5))
+        publisher = HeartbeatPublisher(app, "probes@host", ["probes"], interval=0.05)
+        self.addCleanup(publisher.stop)
+        # The heartbeats reuse the connections of the pool of the app
+        with mock.patch.object(app, 'connection_for_read') as mock_connection_for_read:
+            self.assertEqual(publisher.queue_depths(), {'probes': 1})
+        mock_connection_for_read.assert_not_called()
+
+        deadline = time.monotonic() + 5
+        while "probes@host" not in listener.health_state()[0]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(listener.health_state()[0]['probes@host']['queues'], {'probes': 1})
+
+    @mock.patch('simulator_api.celery_tasks.health.notify_heartbeat')
+    def test_publish_failure(self, mock_notify_heartbeat):
+        app = Celery('test', broker='memory://')
+        publisher = HeartbeatPublisher(app, "probes@host", ["missing"], interval=0.05)
+        self.addCleanup(publisher.stop)
+        time.sleep(0.2)
+        self.assertTrue(publisher._thread.is_alive())
+        mock_notify_heartbeat.assert_not_called()
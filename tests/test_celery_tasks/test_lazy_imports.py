@@ -0,0 +1,21 @@
+import subprocess
+import sys
+import unittest
+
+from simulator_api.celery_tasks.tasks import LAZY_MODULES
+
+LOADED_MODULES = """
+import sys
+import simulator_api.celery_tasks.tasks
+print("\\n".join(sys.modules))
+"""
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_worker_modules_not_imported(self):
+        # Processes only sending tasks do not load the transports and the databases
+        modules = subprocess.run(
+            [sys.executable, "-c", LOADED_MODULES], check=True, capture_output=True, text=True
+        ).stdout.split()
+        for module in LAZY_MODULES + ("sqlalchemy",):
+            self.assertNotIn(module, modules)
@@ -0,0 +1,61 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from celery import Celery
+
+from simulator_api.celery_tasks.notifications import (
+    CompletionListener,
+    notify_completion,
+    wait_for_completion,
+)
+
+
+class TestCompletionListener(unittest.TestCase):
+    def setUp(self):
+        self.app = Celery('test', broker='memory://')
+        self.listener = CompletionListener(self.app)
+        self.assertTrue(self.listener.ready.wait(5))
+
+    def test_waiter_notified(self):
+        with self.listener.waiting("task-1") as completed, self.listener.waiting("task-2") as other:
+            notify_completion(self.app, "task-1", "SUCCESS")
+            self.assertTrue(completed.wait(5))
+            self.assertFalse(other.is_set())
+        self.assertEqual(self.listener._waiters, {})
+
+    def test_wait_for_completion(self):
+        task = mock.MagicMock()
+        task.id = "task-1"
+        task.state = "STARTED"
+
+        def complete():
+            time.sleep(0.2)
+            task.state = "SUCCESS"
+            notify_completion(self.app, "task-1", "SUCCESS")
+
+        start = time.monotonic()
+        threading.Thread(target=complete, daemon=True).start()
+        wait_for_completion(self.listener, task, 5)
+        # Woken up by the notification, long before the deadline
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(task.state, "SUCCESS")
+
+    def test_wait_for_completion_deadline(self):
+        task = mock.MagicMock()
+        task.id = "task-1"
+        task.state = "STARTED"
+
+        start = time.monotonic()
+        wait_for_completion(self.listener, task, 0.2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_wait_for_completed_task(self):
+        task = mock.MagicMock()
+        task.id = "task-1"
+        task.state = "SUCCESS"
+
+        start = time.monotonic()
+        wait_for_completion(self.listener, task, 5)
+        self.assertLess(time.monotonic() - start, 1)
@@ -0,0 +1,45 @@
+import os
+import unittest
+from unittest import mock
+
+from simulator_api.celery_tasks import queues
+from simulator_api.celery_tasks.queues import QUEUES, worker_options
+from simulator_api.celery_tasks.tasks import celery_instance
+
+
+class TestQueues(unittest.TestCase):
+    def test_every_task_routed(self):
+        tasks = [name for name in celery_instance.tasks if name.startswith(queues.TASKS_MODULE)]
+        self.assertTrue(tasks)
+        for name in tasks:
+            queue = celery_instance.amqp.router.route({}, name)['queue'].name
+            self.assertIn(queue, QUEUES)
+
+    def test_long_tasks_not_with_probes(self):
+        router = celery_instance.amqp.router
+        echo = router.route({}, f"{queues.TASKS_MODULE}.echo_topic")['queue'].name
+        probe = router.route({}, f"{queues.TASKS_MODULE}.communication_test")['queue'].name
+        self.assertNotEqual(echo, probe)
+
+    @mock.patch.dict(os.environ, {"SIMULATOR_API_QUEUES_ECHOES_CONCURRENCY": "6"})
+    def test_worker_options(self):
+        options = worker_options("echoes")
+        self.assertIn("--queues=echoes", options)
+        self.assertIn("--concurrency=6", options)
+        self.assertIn("--prefetch-multiplier=1", options)
+        # Tasks queued without route are consumed by the probes worker
+        self.assertIn("--queues=probes,celery", worker_options("probes"))
+
+    @mock.patch.object(queues, "available_cores", return_value=2)
+    @mock.patch.dict(
+        os.environ,
+        {"SIMULATOR_API_QUEUES_AUTOSCALE": "true", "SIMULATOR_API_QUEUES_ECHOES_CONCURRENCY": "6"},
+    )
+    def test_autoscale_bounded_by_cores(self, _cores):
+        options = worker_options("echoes")
+        self.assertIn("--autoscale=2,1", options)
+        self.assertFalse([option for option in options if option.startswith("--concurrency")])
+
+    def test_not_valid_queue(self):
+        with self.assertRaises(ValueError):
+            worker_options("celery")
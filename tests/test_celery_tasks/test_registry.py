@@ -0,0 +1,155 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import sqlalchemy
+
+from simulator_api.celery_tasks.registry import TaskRegistry
+
+
+class TestTaskRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "celery_tasks.sqlite3")
+        self.registry = TaskRegistry(db_path=self.db_path, flush_interval=60)
+
+    def tearDown(self):
+        self.registry.close()
+        self.tmp_dir.cleanup()
+
+    def test_add_and_update_tasks(self):
+        self.registry.add_task("task-1")
+        self.registry.add_task("task-2")
+        self.registry.flush()
+        self.registry.set_state("task-1", "SUCCESS")
+
+        self.assertEqual(
+            sorted(self.registry.task_ids()), [("task-1", "SUCCESS"), ("task-2", "SENT")]
+        )
+
+    def test_state_writes_coalesced(self):
+        self.registry.add_task("task-1")
+        self.registry.set_state("task-1", "STARTED")
+        self.registry.set_state("task-1", "FAILURE")
+
+        # A single row is inserted with the last state
+        self.assertEqual(self.registry.task_ids(), [("task-1", "FAILURE")])
+
+    def test_wal_mode(self):
+        with self.registry.engine.connect() as conn:
+            mode = conn.execute(sqlalchemy.text("PRAGMA journal_mode")).scalar()
+        self.assertEqual(mode, "wal")
+
+    def test_existing_database(self):
+        self.registry.add_task("task-1")
+        self.registry.close()
+
+        # Reopening the database keeps the registered tasks
+        self.registry = TaskRegistry(db_path=self.db_path, flush_interval=60)
+        self.assertEqual(self.registry.task_ids(), [("task-1", "SENT")])
+
+    def test_has_task(self):
+        self.registry.add_task("task-1")
+
+        self.assertTrue(self.registry.has_task("task-1"))
+        self.assertFalse(self.registry.has_task("task-2"))
+
+    def test_list_tasks_pagination(self):
+        for i in range(5):
+            self.registry.add_task(f"task-{i}")
+
+        tasks, cursor = self.registry.list_tasks(limit=2)
+        self.assertEqual([task['task_id'] for task in tasks], ["task-4", "task-3"])
+        tasks, cursor = self.registry.list_tasks(limit=2, cursor=cursor)
+        self.assertEqual([task['task_id'] for task in tasks], ["task-2", "task-1"])
+        tasks, cursor = self.registry.list_tasks(limit=2, cursor=cursor)
+        self.assertEqual([task['task_id'] for task in tasks], ["task-0"])
+        self.assertIsNone(cursor)
+
+    def test_list_tasks_filters(self):
+        self.registry.add_task("task-old", created=datetime(2023, 1, 1))
+        self.registry.add_task("task-new", created=datetime(2024, 1, 1))
+        self.registry.flush()
+        self.registry.set_state("task-new", "SUCCESS")
+
+        tasks, _ = self.registry.list_tasks(state="SUCCESS")
+        self.assertEqual([task['task_id'] for task in tasks], ["task-new"])
+        tasks, _ = self.registry.list_tasks(until=datetime(2023, 6, 1))
+        self.assertEqual([task['task_id'] for task in tasks], ["task-old"])
+        tasks, _ = self.registry.list_tasks(since=datetime(2023, 6, 1))
+        self.assertEqual(tasks[0]['created'], "2024-01-01T00:00:00")
+
+    def test_indexes(self):
+        indexes = sqlalchemy.inspect(self.registry.engine).get_indexes("celery_tasks")
+        self.assertEqual(
+            sorted(index['column_names'][0] for index in indexes), ["created", "task_id"]
+        )
+
+    def test_state_written_before_task(self):
+        # The worker writes the final state before the api process registers the task
+        worker_registry = TaskRegistry(db_path=self.db_path, flush_interval=60)
+        worker_registry.set_state("task-1", "SUCCESS")
+        worker_registry.close()
+        self.registry.add_task("task-1", created=datetime(2024, 1, 1))
+
+        tasks, _ = self.registry.list_tasks()
+        self.assertEqual(
+            tasks, [{'task_id': "task-1", 'state': "SUCCESS", 'created': "2024-01-01T00:00:00"}]
+        )
+
+    def test_migrate_duplicate_task_ids(self):
+        self.registry.close()
+        engine = sqlalchemy.create_engine(f'sqlite:///{self.db_path}')
+        with engine.begin() as conn:
+            conn.execute(sqlalchemy.text("DROP INDEX ux_celery_tasks_task_id"))
+            conn.execute(
+                sqlalchemy.text("CREATE INDEX ix_celery_tasks_task_id ON celery_tasks (task_id)")
+            )
+            conn.execute(
+                sqlalchemy.text(
+                    "INSERT INTO celery_tasks (task_id, state) "
+                    "VALUES ('task-1', 'SENT'), ('task-1', 'SUCCESS'), ('task-2', 'SENT')"
+                )
+            )
+        engine.dispose()
+
+        self.registry = TaskRegistry(db_path=self.db_path, flush_interval=60)
+        self.assertEqual(
+            sorted(self.registry.task_ids()), [("task-1", "SUCCESS"), ("task-2", "SENT")]
+        )
+        indexes = sqlalchemy.inspect(self.registry.engine).get_indexes("celery_tasks")
+        self.assertEqual(
+            sorted((index['name'], index['unique']) for index in indexes),
+            [("ix_celery_tasks_created", 0), ("ux_celery_tasks_task_id", 1)],
+        )
+
+    def test_claim_key(self):
+        self.assertEqual(self.registry.claim_key("key", "params", "a", 60), ("a", "params"))
+        # The key keeps its first task during the window
+        self.assertEqual(self.registry.claim_key("key", "params", "b", 60), ("a", "params"))
+        self.assertEqual(self.registry.claim_key("key", "other", "c", 60), ("a", "params"))
+        # Then it is mapped to a new task
+        self.assertEqual(self.registry.claim_key("key", "other", "d", 0), ("d", "other"))
+
+    def test_release_key(self):
+        self.registry.claim_key("key", "params", "a", 60)
+        # Only the task mapped to the key releases it
+        self.registry.release_key("key", "b")
+        self.assertEqual(self.registry.claim_key("key", "params", "c", 60), ("a", "params"))
+        self.registry.release_key("key", "a")
+        self.assertEqual(self.registry.claim_key("key", "params", "c", 60), ("c", "params"))
+
+    def test_prune(self):
+        self.registry.add_task("old", created=datetime.now() - timedelta(days=2))
+        for task_id in ("a", "b", "c"):
+            self.registry.add_task(task_id)
+        self.registry.claim_key("key", "params", "a", 60)
+
+        self.assertEqual(self.registry.prune(max_age=3600), 1)
+        # The most recent tasks are kept
+        self.assertEqual(self.registry.prune(max_rows=2), 1)
+        self.assertEqual([task['task_id'] for task in self.registry.list_tasks()[0]], ["c", "b"])
+
+        self.registry.prune(keys_max_age=60)
+        self.assertEqual(self.registry.claim_key("key", "params", "d", 60), ("a", "params"))
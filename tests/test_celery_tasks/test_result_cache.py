@@ -0,0 +1,47 @@
+import time
+import unittest
+
+from prometheus_client import REGISTRY
+
+from simulator_api.celery_tasks.result_cache import CachedResult, ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    @staticmethod
+    def lookups(result):
+        return (
+            REGISTRY.get_sample_value(
+                "simulator_api_result_cache_lookups_total", {'result': result}
+            )
+            or 0
+        )
+
+    def test_hits_and_misses(self):
+        hits, misses = self.lookups("hit"), self.lookups("miss")
+        cache = ResultCache(max_size=10, ttl=60)
+        self.assertIsNone(cache.get("a"))
+
+        cache.put(CachedResult("a", "SUCCESS", {'status': "SUCCESS"}))
+        self.assertEqual(cache.get("a").info, {'status': "SUCCESS"})
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+        # The counters are exported as metrics
+        self.assertEqual((self.lookups("hit") - hits, self.lookups("miss") - misses), (1, 1))
+
+    def test_least_recently_used_evicted(self):
+        cache = ResultCache(max_size=2, ttl=60)
+        cache.put(CachedResult("a", "SUCCESS", None))
+        cache.put(CachedResult("b", "SUCCESS", None))
+        cache.get("a")
+        cache.put(CachedResult("c", "SUCCESS", None))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_expired_result(self):
+        cache = ResultCache(max_size=10, ttl=0.1)
+        cache.put(CachedResult("a", "FAILURE", None))
+        time.sleep(0.2)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()['size'], 0)
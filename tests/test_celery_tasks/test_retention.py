@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from celery import Celery
+from celery.backends.database import DatabaseBackend, session_cleanup
+from celery.backends.database.session import SessionManager
+
+from simulator_api.celery_tasks import retention
+from simulator_api.celery_tasks.retention import compact, database_size, prune_results, sqlite_path
+from simulator_api.celery_tasks.tasks import convert_databases
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_sqlite_path(self):
+        self.assertEqual(sqlite_path("db+sqlite:////data/results.sqlite3"), "/data/results.sqlite3")
+        self.assertIsNone(sqlite_path("redis://localhost"))
+
+    def test_prune_results(self):
+        db_path = os.path.join(self.tmp_dir.name, "results.sqlite3")
+        backend = DatabaseBackend(app=Celery('test'), url=f'sqlite:///{db_path}')
+        # The default session manager only creates the tables of its first database
+        session_manager = SessionManager()
+        backend.ResultSession = lambda: DatabaseBackend.ResultSession(backend, session_manager)
+        for task_id in ("old", "a", "b", "c"):
+            backend.store_result(task_id, {'status': "SUCCESS"}, "SUCCESS")
+        session = backend.ResultSession()
+        with session_cleanup(session):
+            task = session.query(backend.task_cls).filter_by(task_id="old").one()
+            task.date_done = datetime.utcnow() - timedelta(days=2)
+            session.commit()
+
+        self.assertEqual(prune_results(backend, max_age=3600), 1)
+        # The most recent results are kept
+        self.assertEqual(prune_results(backend, max_rows=2), 1)
+        self.assertEqual(backend.get_task_meta("a")['status'], "PENDING")
+        self.assertEqual(backend.get_task_meta("c")['status'], "SUCCESS")
+
+    def test_compact(self):
+        db_path = os.path.join(self.tmp_dir.name, "data.sqlite3")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE data (value TEXT)")
+            conn.executemany("INSERT INTO data VALUES (?)", [("x" * 1000,)] * 1000)
+        compact(db_path)
+        full_size = database_size(db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM data")
+        self.assertEqual(database_size(db_path), full_size)
+        # Databases are converted to incremental vacuum on the first compaction
+        self.assertGreater(compact(db_path), 0)
+        self.assertLess(database_size(db_path), full_size / 10)
+
+    def test_compact_missing_database(self):
+        self.assertEqual(compact(os.path.join(self.tmp_dir.name, "missing.sqlite3")), 0)
+
+    def create_database(self, name):
+        db_path = os.path.join(self.tmp_dir.name, name)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE data (value TEXT)")
+            conn.executemany("INSERT INTO data VALUES (?)", [("x" * 1000,)] * 1000)
+        return db_path
+
+    @staticmethod
+    def auto_vacuum(db_path):
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    def test_compact_large_database_not_converted(self):
+        db_path = self.create_database("data.sqlite3")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM data")
+
+        # The full vacuum of a large database is left to the startup of the worker
+        with mock.patch.object(retention, 'MAX_ONLINE_CONVERSION_SIZE', 1024):
+            compact(db_path)
+        self.assertEqual(self.auto_vacuum(db_path), 0)
+
+        self.assertTrue(retention.enable_incremental_vacuum(db_path))
+        self.assertFalse(retention.enable_incremental_vacuum(db_path))
+        self.assertEqual(self.auto_vacuum(db_path), retention.INCREMENTAL_VACUUM)
+
+    @mock.patch('simulator_api.celery_tasks.retention.database_paths')
+    def test_convert_databases_at_startup(self, mock_database_paths):
+        db_path = self.create_database("data.sqlite3")
+        mock_database_paths.return_value = {'registry': db_path}
+        worker = mock.MagicMock()
+
+        # Only the worker applying the retention policy converts the databases
+        worker.app.amqp.queues.consume_from = {'probes': None, 'celery': None}
+        convert_databases(sender=worker)
+        self.assertEqual(self.auto_vacuum(db_path), 0)
+
+        worker.app.amqp.queues.consume_from = {'batches': None}
+        convert_databases(sender=worker)
+        self.assertEqual(self.auto_vacuum(db_path), retention.INCREMENTAL_VACUUM)
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from celery import Celery
+from celery.backends.database import DatabaseBackend
+
+from simulator_api.celery_tasks.tasks import task_results
+from simulator_api.celery_tasks.result_cache import get_result_cache
+
+
+class TestTaskResults(unittest.TestCase):
+    def setUp(self):
+        get_result_cache().clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        db_path = os.path.join(self.tmp_dir.name, "results.sqlite3")
+        self.backend = DatabaseBackend(app=Celery('test'), url=f'sqlite:///{db_path}')
+
+        patcher = mock.patch.object(Celery, 'backend', new_callable=mock.PropertyMock)
+        patcher.start().return_value = self.backend
+        self.addCleanup(patcher.stop)
+
+    def test_task_results(self):
+        self.backend.store_result("done", {'status': "SUCCESS"}, "SUCCESS")
+        self.backend.store_result("running", {'status': "RUNNING"}, "PROGRESS")
+
+        results = task_results(["done", "running", "unknown"])
+        self.assertEqual(results["done"].state, "SUCCESS")
+        self.assertEqual(results["done"].info, {'status': "SUCCESS"})
+        self.assertEqual(results["running"].state, "PROGRESS")
+        self.assertEqual(results["unknown"].state, "PENDING")
+
+        # Only the complete task is cached
+        self.assertEqual(get_result_cache().stats(), {'hits': 0, 'misses': 3, 'size': 1})
+        task_results(["done"])
+        self.assertEqual(get_result_cache().stats()['hits'], 1)
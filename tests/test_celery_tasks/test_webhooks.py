@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from simulator_api.celery_tasks.webhooks import WebhookDispatcher
+from simulator_api.celery_tasks.tasks import flush_task_registry, task_post_run
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """Local stand-in of a webhook receiver, answering with the queued status codes"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append(json.loads(body))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestWebhookDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CallbackHandler)
+        self.server.received = []
+        self.server.statuses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/callback"
+
+    def test_delivery(self):
+        dispatcher = WebhookDispatcher()
+        self.assertTrue(dispatcher.submit(self.url, {'task_id': "1", 'state': "SUCCESS"}))
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(self.server.received, [{'task_id': "1", 'state': "SUCCESS"}])
+        self.assertEqual(dispatcher.delivered, 1)
+
+    def test_retry_with_backoff(self):
+        self.server.statuses = [500, 503]
+        dispatcher = WebhookDispatcher(backoff=0.05)
+        dispatcher.submit(self.url, {'task_id': "1"})
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(len(self.server.received), 3)
+        self.assertEqual(dispatcher.delivered, 1)
+
+    def test_client_error_not_retried(self):
+        self.server.statuses = [400]
+        dispatcher = WebhookDispatcher(backoff=0.05)
+        dispatcher.submit(self.url, {'task_id': "1"})
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(len(self.server.received), 1)
+        self.assertEqual(dispatcher.failed, 1)
+
+    def test_unreachable_receiver_abandoned(self):
+        dispatcher = WebhookDispatcher(max_retries=2, backoff=0.01, timeout=0.5)
+        dispatcher.submit("http://127.0.0.1:1/callback", {'task_id': "1"})
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(dispatcher.failed, 1)
+
+    def test_full_queue_dropped(self):
+        release = threading.Event()
+
+        def blocked_post(delivery):
+            release.wait(5)
+            return True, False, None
+
+        dispatcher = WebhookDispatcher(queue_size=1)
+        with mock.patch.object(dispatcher, "_post", side_effect=blocked_post):
+            # The first delivery blocks the delivery thread, the second one fills the queue
+            self.assertTrue(dispatcher.submit(self.url, {'task_id': "1"}))
+            while not dispatcher._queue.empty():
+                time.sleep(0.01)
+            self.assertTrue(dispatcher.submit(self.url, {'task_id': "2"}))
+            self.assertFalse(dispatcher.submit(self.url, {'task_id': "3"}))
+            release.set()
+            self.assertTrue(dispatcher.flush(5))
+        self.assertEqual((dispatcher.delivered, dispatcher.dropped), (2, 1))
+
+    def test_retries_counted_in_queue(self):
+        self.server.statuses = [503]
+        dispatcher = WebhookDispatcher(queue_size=1, backoff=0.2)
+        self.assertTrue(dispatcher.submit(self.url, {'task_id': "1"}))
+        while not dispatcher._retries:
+            time.sleep(0.01)
+
+        # The delivery waiting for its retry fills the queue
+        self.assertFalse(dispatcher.submit(self.url, {'task_id': "2"}))
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual((dispatcher.delivered, dispatcher.dropped), (1, 1))
+        self.assertEqual(self.server.received, [{'task_id': "1"}, {'task_id': "1"}])
+
+
+class TestTaskPostRun(unittest.TestCase):
+    @mock.patch('simulator_api.celery_tasks.tasks.notify_completion')
+    @mock.patch('simulator_api.celery_tasks.registry.get_registry')
+    @mock.patch('simulator_api.celery_tasks.tasks.get_dispatcher')
+    def test_result_delivered(self, mock_get_dispatcher, mock_get_registry, mock_notify):
+        task = mock.MagicMock()
+        task.request.callback_url = "http://localhost/callback"
+
+        task_post_run(task_id="1", task=task, retval={'status': "SUCCESS"}, state="SUCCESS")
+        mock_get_dispatcher.return_value.submit.assert_called_once_with(
+            "http://localhost/callback",
+            {'task_id': "1", 'state': "SUCCESS", 'result': {'status': "SUCCESS"}},
+        )
+
+        mock_get_dispatcher.reset_mock()
+        task.request.callback_url = None
+        task_post_run(task_id="2", task=task, retval={'status': "SUCCESS"}, state="SUCCESS")
+        mock_get_dispatcher.return_value.submit.assert_not_called()
+
+
+class TestWorkerProcessShutdown(unittest.TestCase):
+    @mock.patch('simulator_api.celery_tasks.tasks.flush_dispatcher')
+    @mock.patch('simulator_api.transport.subscriber.stop_subscriber')
+    @mock.patch('simulator_api.celery_tasks.registry.close_registry')
+    def test_resources_released(self, mock_close_registry, mock_stop_subscriber, mock_flush):
+        flush_task_registry()
+        mock_close_registry.assert_called_once_with()
+        mock_stop_subscriber.assert_called_once_with()
+        mock_flush.assert_called_once()
@@ -1,8 +1,15 @@
+import os
+import tempfile
 import unittest
 from unittest import mock
 
+from flask import Flask
+from werkzeug.exceptions import UnprocessableEntity
+
+from simulator_api.celery_tasks.registry import TaskRegistry
 from simulator_api.commands.communication_test import CommunicationTest
 from simulator_api.celery_tasks.tasks import communication_test
+from simulator_api.celery_tasks.result_cache import get_result_cache
 
 mock_celery_task_obj = mock.MagicMock()
 mock_celery_task_obj.id = 12345
@@ -11,6 +18,10 @@ mock_celery_task_obj.info = {'status': "SUCCESS", 'info': "hello"}
 
 
 class TestCommandCommunicationTest(unittest.TestCase):
+    def setUp(self):
+        # Results of complete tasks are cached by id in the process
+        get_result_cache().clear()
+
     @mock.patch('simulator_api.commands.communication_test.communication_test.apply_async')
     def test_post_execute_communication_test(self, mock_communincation_test_async_result):
         mock_communincation_test_async_result.return_value = mock_celery_task_obj
@@ -23,6 +34,31 @@ class TestCommandCommunicationTest(unittest.TestCase):
         self.assertEqual(response.status_code, 202)
         self.assertEqual(response.content, {'task_id': 12345})
 
+    @mock.patch('simulator_api.commands.communication_test.communication_test.apply_async')
+    def test_post_idempotency_key(self, mock_apply_async):
+        mock_apply_async.side_effect = lambda task_id=None, **kwargs: mock.Mock(id=task_id)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry = TaskRegistry(db_path=os.path.join(tmp_dir, "celery_tasks.sqlite3"))
+            self.addCleanup(registry.close)
+            app = Flask(__name__)
+            command = CommunicationTest()
+
+            with mock.patch(
+                'simulator_api.celery_tasks.registry.get_registry', return_value=registry
+            ):
+                with app.test_request_context(headers={'Idempotency-Key': "retry"}):
+                    first = command.post_execute_latest({'timeout': "3"}, None, None)
+                    retry = command.post_execute_latest({'timeout': "3"}, None, None)
+                    # A key is bound to the parameters of its first request
+                    with self.assertRaises(UnprocessableEntity):
+                        command.post_execute_latest({'timeout': "4"}, None, None)
+                with app.test_request_context():
+                    other = command.post_execute_latest({'timeout': "3"}, None, None)
+
+        self.assertEqual(first.content, retry.content)
+        self.assertNotEqual(first.content, other.content)
+        self.assertEqual(mock_apply_async.call_count, 2)
+
     @mock.patch('simulator_api.commands.communication_test.communication_test.AsyncResult')
     def test_get_execute_communication_test(self, mock_communincation_test_async_result):
         mock_communincation_test_async_result.return_value = mock_celery_task_obj
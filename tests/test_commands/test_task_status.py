@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+from werkzeug.exceptions import BadRequest
+
+from simulator_api.commands.task_status import TaskStatus, task_info_response
+from simulator_api.celery_tasks.result_cache import CachedResult
+
+mock_results = {
+    "a": CachedResult("a", "SUCCESS", {'status': "SUCCESS"}),
+    "b": CachedResult("b", "PENDING", None),
+    "c": CachedResult("c", "FAILURE", ValueError()),
+}
+
+
+class TestCommandTaskStatus(unittest.TestCase):
+    @mock.patch('simulator_api.commands.task_status.task_results')
+    def test_get_execute_task_status(self, mock_task_results):
+        mock_task_results.return_value = mock_results
+
+        command = TaskStatus()
+
+        response = command.get_execute_latest({"ids": "a,b,c,a"}, None)
+        mock_task_results.assert_called_once_with(["a", "b", "c"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content,
+            {
+                'tasks': {
+                    "a": {'state': "SUCCESS", 'info': {'status': "SUCCESS"}},
+                    "b": {'state': "PENDING", 'info': {'status': "Celery Task is pending"}},
+                    "c": {'state': "FAILURE", 'info': {'status': "Celery Task failed"}},
+                }
+            },
+        )
+
+    @mock.patch('simulator_api.commands.task_status.task_results')
+    def test_post_execute_task_status(self, mock_task_results):
+        mock_task_results.return_value = mock_results
+
+        command = TaskStatus()
+
+        response = command.post_execute_latest({}, '{"task_ids": ["a", "b", "c"]}', None)
+        mock_task_results.assert_called_once_with(["a", "b", "c"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.content['tasks'].keys()), ["a", "b", "c"])
+
+    def test_post_execute_bad_params(self):
+        command = TaskStatus()
+
+        for bad_body in [
+            "not json",
+            {"task_ids": [1, 2]},
+            {"task_ids": [str(i) for i in range(1000)]},
+        ]:
+            with self.assertRaises(BadRequest):
+                command.post_execute_latest({}, bad_body, None)
+
+    @mock.patch('simulator_api.commands.task_status.task_result')
+    def test_task_info_response(self, mock_task_result):
+        task = mock.MagicMock()
+        for task_id, result in mock_results.items():
+            mock_task_result.return_value = result
+            response = task_info_response(task, task_id, {"wait": "2"})
+            mock_task_result.assert_called_with(task, task_id, wait=2.0)
+            self.assertEqual(response.status_code, 200)
+
+        # The commands answer the same info as the task-status requests
+        self.assertEqual(response.content, {'status': "Celery Task failed"})
+
+        with self.assertRaises(BadRequest):
+            task_info_response(task, "a", {"wait": "-1"})
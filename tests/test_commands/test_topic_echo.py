@@ -1,8 +1,12 @@
 import unittest
 from unittest import mock
+from werkzeug.exceptions import BadRequest
 
 from simulator_api.commands.topic_echo import TopicEcho
-from simulator_api.celery_tasks.tasks import echo_topic
+from simulator_api.celery_tasks.tasks import echo_topic, echo_topic_message
+from simulator_api.utils.utils import last_subprocess
+from simulator_api.celery_tasks.result_cache import get_result_cache
+from simulator_api.celery_tasks.coalescing import TaskCoalescer
 
 mock_celery_task_obj = mock.MagicMock()
 mock_celery_task_obj.id = 12345
@@ -11,6 +15,10 @@ mock_celery_task_obj.info = {'status': "SUCCESS", 'info': "hello"}
 
 
 class TestCommandTopicEcho(unittest.TestCase):
+    def setUp(self):
+        # Results of complete tasks are cached by id in the process
+        get_result_cache().clear()
+
     @mock.patch('simulator_api.commands.topic_echo.echo_topic.apply_async')
     def test_post_execute_communication_test(self, mock_echo_topic_async_result):
         mock_echo_topic_async_result.return_value = mock_celery_task_obj
@@ -28,6 +36,40 @@ class TestCommandTopicEcho(unittest.TestCase):
         self.assertEqual(response.status_code, 202)
         self.assertEqual(response.content, {'task_id': 12345})
 
+    @mock.patch('simulator_api.commands.topic_echo.echo_topic.apply_async')
+    def test_post_execute_callback(self, mock_echo_topic_async_result):
+        mock_echo_topic_async_result.return_value = mock_celery_task_obj
+
+        command = TopicEcho()
+
+        command.post_execute_latest(
+            {"topic": "/dummy", "timeout": 1, "callback": "http://spawner:8080/results"}, None, None
+        )
+        mock_echo_topic_async_result.assert_called_once_with(
+            args=("/dummy", 1), headers={'callback_url': "http://spawner:8080/results"}
+        )
+
+        with self.assertRaises(BadRequest):
+            command.post_execute_latest(
+                {"topic": "/dummy", "timeout": 1, "callback": "file:///etc/passwd"}, None, None
+            )
+
+    @mock.patch('simulator_api.celery_tasks.tasks.get_coalescer')
+    @mock.patch('simulator_api.commands.topic_echo.echo_topic.apply_async')
+    def test_post_execute_coalesced(self, mock_echo_topic_async_result, mock_get_coalescer):
+        mock_echo_topic_async_result.return_value = mock_celery_task_obj
+        mock_get_coalescer.return_value = TaskCoalescer(mock.MagicMock())
+
+        command = TopicEcho()
+
+        # Identical requests share the same task
+        for _ in range(3):
+            response = command.post_execute_latest(
+                {"topic": "/coalesced", "timeout": 5}, None, None
+            )
+            self.assertEqual(response.content, {'task_id': 12345})
+        mock_echo_topic_async_result.assert_called_once_with(args=("/coalesced", 5))
+
     @mock.patch('simulator_api.commands.topic_echo.echo_topic.AsyncResult')
     def test_get_execute_communication_test(self, mock_echo_topic_async_result):
         mock_echo_topic_async_result.return_value = mock_celery_task_obj
@@ -40,6 +82,24 @@ class TestCommandTopicEcho(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.content, {'status': "SUCCESS", 'info': "hello"})
 
+    @mock.patch('simulator_api.celery_tasks.tasks.wait_for_task')
+    @mock.patch('simulator_api.commands.topic_echo.echo_topic.AsyncResult')
+    def test_get_execute_wait(self, mock_echo_topic_async_result, mock_wait_for_task):
+        mock_echo_topic_async_result.return_value = mock_celery_task_obj
+
+        command = TopicEcho()
+
+        response = command.get_execute_latest({"wait": "5"}, 12345)
+        mock_wait_for_task.assert_called_once_with(mock_celery_task_obj, 5.0)
+        self.assertEqual(response.content, {'status': "SUCCESS", 'info': "hello"})
+
+        # The result of the complete task is cached, the backend is not read again
+        mock_wait_for_task.reset_mock()
+        response = command.get_execute_latest({"wait": "5"}, 12345)
+        mock_wait_for_task.assert_not_called()
+        mock_echo_topic_async_result.assert_called_once()
+        self.assertEqual(response.content, {'status': "SUCCESS", 'info': "hello"})
+
     @mock.patch('simulator_api.commands.topic_echo.echo_topic.update_state')
     def test_communication_test(self, mock_echo_topic_update):
         input_topic = "/dummy"
@@ -54,3 +114,43 @@ class TestCommandTopicEcho(unittest.TestCase):
         self.assertEqual(result['command'], expected_command)
         self.assertEqual(result['status'], expected_status)
         self.assertEqual(expected_exitcode, result['exitcode'])
+
+    @mock.patch('simulator_api.transport.subscriber.get_subscriber')
+    @mock.patch('simulator_api.transport.subscriber.subscriber_available', return_value=True)
+    def test_echo_subscriber_recorded(self, _mock_available, mock_get_subscriber):
+        mock_get_subscriber.return_value.echo.return_value = {
+            'command': "echo",
+            'status': "TIMEOUT",
+        }
+
+        result = echo_topic_message("/dummy", 1)
+        self.assertEqual(result['status'], "TIMEOUT")
+        # The outcome of the subscriber is reported by the health as the last command
+        self.assertEqual(last_subprocess['status'], "TIMEOUT")
+
+    def test_stream_events(self):
+        mock_subscription = mock.MagicMock()
+        mock_subscription.topic = "/dummy"
+        mock_subscription.iter_messages.return_value = iter(['data: "a"', 'data: "b"', 'data: "c"'])
+
+        events = list(TopicEcho._stream_events(mock_subscription, 2, 5, None))
+        self.assertEqual(len(events), 3)
+        self.assertEqual(
+            events[0],
+            'id: 1\nevent: message\ndata: {"topic": "/dummy", "message": "data: \\"a\\""}\n\n',
+        )
+        self.assertEqual(
+            events[-1], 'event: end\ndata: {"topic": "/dummy", "status": "SUCCESS", "count": 2}\n\n'
+        )
+
+    def test_stream_execute_bad_params(self):
+        command = TopicEcho()
+
+        for bad_params in [
+            {"topic": "dummy"},
+            {"topic": "/dummy", "max-count": "a"},
+            {"topic": "/dummy", "max-duration": "40000"},
+            {"topic": "/dummy", "rate": "-1"},
+        ]:
+            with self.assertRaises(BadRequest):
+                command.stream_execute_latest(bad_params)
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+from werkzeug.exceptions import BadRequest
+
+from simulator_api.commands.topic_echo_batch import TopicEchoBatch
+from simulator_api.celery_tasks.tasks import echo_topics
+from simulator_api.celery_tasks.result_cache import get_result_cache
+
+mock_celery_task_obj = mock.MagicMock()
+mock_celery_task_obj.id = 12345
+mock_celery_task_obj.state = "SUCCESS"
+mock_celery_task_obj.info = {'status': "SUCCESS", 'results': {}}
+
+
+class TestCommandTopicEchoBatch(unittest.TestCase):
+    def setUp(self):
+        # Results of complete tasks are cached by id in the process
+        get_result_cache().clear()
+
+    @mock.patch('simulator_api.commands.topic_echo_batch.echo_topics.apply_async')
+    def test_post_execute_topic_echo_batch(self, mock_echo_topics_async_result):
+        mock_echo_topics_async_result.return_value = mock_celery_task_obj
+
+        command = TopicEchoBatch()
+
+        response = command.post_execute_latest(
+            {"concurrency": "2"},
+            '{"topics": [{"topic": "/a", "timeout": 1}, {"topic": "/b", "timeout": "2"}]}',
+            None,
+        )
+        mock_echo_topics_async_result.assert_called_once_with(
+            args=([{'topic': "/a", 'timeout': 1}, {'topic': "/b", 'timeout': 2}], 2)
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.content, {'task_id': 12345})
+
+    def test_post_execute_bad_params(self):
+        command = TopicEchoBatch()
+
+        for bad_body in [
+            "not json",
+            {"topics": [{"topic": "a", "timeout": 1}]},
+            {"topics": [{"topic": "/a", "timeout": 1}, {"topic": "/a", "timeout": 1}]},
+            {"topics": [{"topic": "/a", "timeout": 1000}]},
+            {"topics": [{"topic": "/a", "timeout": "a"}]},
+            {"topics": [{"topic": f"/{i}", "timeout": 1} for i in range(1000)]},
+        ]:
+            with self.assertRaises(BadRequest):
+                command.post_execute_latest({}, bad_body, None)
+
+        with self.assertRaises(BadRequest):
+            command.post_execute_latest(
+                {"concurrency": "0"}, {"topics": [{"topic": "/a", "timeout": 1}]}, None
+            )
+
+    @mock.patch('simulator_api.commands.topic_echo_batch.echo_topics.AsyncResult')
+    def test_get_execute_topic_echo_batch(self, mock_echo_topics_async_result):
+        mock_echo_topics_async_result.return_value = mock_celery_task_obj
+
+        command = TopicEchoBatch()
+
+        response = command.get_execute_latest(None, 12345)
+        mock_echo_topics_async_result.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, {'status': "SUCCESS", 'results': {}})
+
+    @mock.patch('simulator_api.celery_tasks.tasks.echo_topics.update_state')
+    def test_echo_topics(self, mock_echo_topics_update):
+        # Expected results without ignition installed
+        result = echo_topics([{'topic': "/a", 'timeout': 1}, {'topic': "/b", 'timeout': 1}])
+
+        self.assertEqual(result['status'], "ERROR")
+        self.assertEqual(list(result['results'].keys()), ["/a", "/b"])
+        self.assertEqual(result['results']["/a"]['command'], 'ign topic -e -n 1 -t /a')
+        self.assertEqual(result['results']["/b"]['exitcode'], 127)
+        self.assertEqual(mock_echo_topics_update.call_count, 2)
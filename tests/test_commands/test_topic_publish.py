@@ -1,10 +1,48 @@
 import unittest
+from unittest import mock
 
 from simulator_api.commands.topic_publish import TopicPublish
+from simulator_api.celery_tasks.tasks import publish_topic
+from simulator_api.celery_tasks.result_cache import get_result_cache
+
+mock_celery_task_obj = mock.MagicMock()
+mock_celery_task_obj.id = 12345
+mock_celery_task_obj.state = "SUCCESS"
+mock_celery_task_obj.info = {'status': "SUCCESS"}
 
 
 class TestCommandTopicPublish(unittest.TestCase):
-    def test_post_execute_topic_publish(self):
+    def setUp(self):
+        # Results of complete tasks are cached by id in the process
+        get_result_cache().clear()
+
+    @mock.patch('simulator_api.commands.topic_publish.publish_topic.apply_async')
+    def test_post_execute_topic_publish(self, mock_publish_topic_async_result):
+        mock_publish_topic_async_result.return_value = mock_celery_task_obj
+
+        command = TopicPublish()
+
+        response = command.post_execute_latest(
+            {"topic": "/dummy", "message": "dummy", "msgtype": "dummy-type"}, "arg", "arg"
+        )
+        mock_publish_topic_async_result.assert_called_once_with(
+            args=("/dummy", "dummy", "dummy-type")
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.content, {'task_id': 12345})
+
+    @mock.patch('simulator_api.commands.topic_publish.publish_topic.AsyncResult')
+    def test_get_execute_topic_publish(self, mock_publish_topic_async_result):
+        mock_publish_topic_async_result.return_value = mock_celery_task_obj
+
+        command = TopicPublish()
+
+        response = command.get_execute_latest(None, 12345)
+        mock_publish_topic_async_result.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, {'status': "SUCCESS"})
+
+    def test_publish_topic(self):
         input_topic = "/dummy"
         input_message = "dummy"
         input_msgtype = "dummy-type"
@@ -15,16 +53,10 @@ class TestCommandTopicPublish(unittest.TestCase):
         expected_status = "ERROR"
         expected_exitcode = 127  # command not found
 
-        command = TopicPublish()
-
-        response = command.post_execute_latest(
-            {"topic": input_topic, "message": input_message, "msgtype": input_msgtype}, "arg", "arg"
-        )
-        self.assertEqual(response.status_code, 200)
+        result = publish_topic(input_topic, input_message, input_msgtype)
         # Response is dictionary with 4 elements
-        self.assertEqual(len(list(response.content.keys())), 4)
+        self.assertEqual(len(list(result.keys())), 4)
         # Keys of dictionary are command, status, exitcode and output.
-        result = response.content
         self.assertEqual(result['command'], expected_command)
         self.assertEqual(result['status'], expected_status)
         self.assertEqual(expected_exitcode, result['exitcode'])
@@ -0,0 +1,142 @@
+import json
+import time
+import unittest
+from unittest import mock
+from werkzeug.exceptions import BadRequest
+
+from simulator_api.commands.topic_publish_bulk import TopicPublishBulk
+from simulator_api.celery_tasks.tasks import publish_messages
+
+mock_celery_task_obj = mock.MagicMock()
+mock_celery_task_obj.id = 12345
+
+
+class TestCommandTopicPublishBulk(unittest.TestCase):
+    @mock.patch('simulator_api.commands.topic_publish_bulk.publish_messages.apply_async')
+    def test_post_execute_topic_publish_bulk(self, mock_publish_messages_async_result):
+        mock_publish_messages_async_result.return_value = mock_celery_task_obj
+
+        command = TopicPublishBulk()
+        params = {"topic": "/dummy", "msgtype": "dummy-type", "rate": "100"}
+
+        for body in ['["data:1", "data:2"]', b'"data:1"\n"data:2"\n', ["data:1", "data:2"]]:
+            response = command.post_execute_latest(params, body, None)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.content, {'task_id': 12345})
+            mock_publish_messages_async_result.assert_called_with(
+                args=("/dummy", ["data:1", "data:2"], "dummy-type", 100.0)
+            )
+
+    def test_post_execute_bad_params(self):
+        command = TopicPublishBulk()
+        params = {"topic": "/dummy", "msgtype": "dummy-type"}
+
+        for bad_params, bad_body in [
+            ({"topic": "dummy", "msgtype": "dummy-type"}, '["data:1"]'),
+            ({**params, "rate": "a"}, '["data:1"]'),
+            ({**params, "rate": "-1"}, '["data:1"]'),
+            # Would hold the worker for days
+            ({**params, "rate": "0.0001"}, '["data:1", "data:2"]'),
+            (params, 'not json\n'),
+            (params, '[1, 2]'),
+            (params, json.dumps(["data:1"] * 100000)),
+        ]:
+            with self.assertRaises(BadRequest):
+                command.post_execute_latest(bad_params, bad_body, None)
+
+    def test_stream_acks(self):
+        def publish_stream(topic, messages, msgtype, rate, max_in_flight, deadline):
+            for index, message in enumerate(messages):
+                yield {'index': index, 'status': 'SUCCESS'}
+
+        lines = [b'"data:1"\n', b'\n', b'"data:2"\n', b'not json\n', b'"data:3"\n']
+        acks = list(
+            TopicPublishBulk._stream_acks(
+                publish_stream, "/dummy", lines, "type", None, 2, max_messages=10, max_duration=5
+            )
+        )
+        self.assertEqual(
+            acks[:2], ['{"index": 0, "status": "SUCCESS"}\n', '{"index": 1, "status": "SUCCESS"}\n']
+        )
+        self.assertEqual(
+            json.loads(acks[-1]),
+            {
+                'status': 'ERROR',
+                'published': 2,
+                'errors': 0,
+                'output': "Not valid message at line 4, stream stopped.",
+            },
+        )
+
+    def test_stream_acks_limits(self):
+        def publish_stream(topic, messages, msgtype, rate, max_in_flight, deadline):
+            for index, message in enumerate(messages):
+                yield {'index': index, 'status': 'SUCCESS'}
+
+        lines = [b'"data:%d"\n' % i for i in range(5)]
+        acks = list(
+            TopicPublishBulk._stream_acks(
+                publish_stream, "/dummy", lines, "type", None, 2, max_messages=3, max_duration=5
+            )
+        )
+        self.assertEqual(
+            json.loads(acks[-1]),
+            {
+                'status': 'ERROR',
+                'published': 3,
+                'errors': 0,
+                'output': "Maximum number of messages (3) reached at line 4, stream stopped.",
+            },
+        )
+
+        def slow_lines():
+            yield b'"data:1"\n'
+            time.sleep(0.2)
+            yield b'"data:2"\n'
+
+        acks = list(
+            TopicPublishBulk._stream_acks(
+                publish_stream, "/dummy", slow_lines(), "type", None, 2, 10, max_duration=0.1
+            )
+        )
+        self.assertEqual(
+            json.loads(acks[-1]),
+            {
+                'status': 'ERROR',
+                'published': 1,
+                'errors': 0,
+                'output': "Maximum stream duration (0.1s) reached, stream stopped.",
+            },
+        )
+
+        # The publishes scheduled after the deadline are not started
+        def paced_publish_stream(topic, messages, msgtype, rate, max_in_flight, deadline):
+            for index, message in enumerate(messages):
+                if index == 2:
+                    return
+                yield {'index': index, 'status': 'SUCCESS'}
+
+        acks = list(
+            TopicPublishBulk._stream_acks(
+                paced_publish_stream, "/dummy", lines, "type", 0.1, 2, 10, max_duration=5
+            )
+        )
+        self.assertEqual(
+            json.loads(acks[-1]),
+            {
+                'status': 'ERROR',
+                'published': 2,
+                'errors': 0,
+                'output': "Maximum stream duration (5s) reached, stream stopped.",
+            },
+        )
+
+    @mock.patch('simulator_api.celery_tasks.tasks.publish_messages.update_state')
+    def test_publish_messages(self, mock_publish_messages_update):
+        # Expected results without ignition installed
+        result = publish_messages("/dummy", ["data:1", "data:2"], "dummy-type", rate=100)
+
+        self.assertEqual(result['status'], "ERROR")
+        self.assertEqual(result['published'], 2)
+        self.assertEqual([ack['index'] for ack in result['errors']], [0, 1])
+        self.assertEqual(result['errors'][0]['exitcode'], 127)
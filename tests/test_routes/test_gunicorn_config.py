@@ -0,0 +1,32 @@
+import importlib
+import os
+import unittest
+from unittest import mock
+
+from simulator_api.rest_server import gunicorn_config
+
+
+class TestGunicornConfig(unittest.TestCase):
+    def load(self, **variables):
+        env = {f"SIMULATOR_API_SERVER_{name.upper()}": value for name, value in variables.items()}
+        with mock.patch.dict(os.environ, env):
+            return importlib.reload(gunicorn_config)
+
+    def tearDown(self):
+        importlib.reload(gunicorn_config)
+
+    @mock.patch("simulator_api.utils.utils.available_cores", return_value=6)
+    def test_workers_sized_from_cores(self, _cores):
+        config = self.load(workers="0")
+        self.assertEqual(config.workers, gunicorn_config.MAX_AUTO_WORKERS)
+        self.assertEqual(self.load(workers="3").workers, 3)
+
+    def test_threads_of_sync_workers(self):
+        self.assertEqual(self.load(worker_class="gthread", threads="8").threads, 8)
+        # Sync workers handle a single request at a time
+        self.assertEqual(self.load(worker_class="sync", threads="8").threads, 1)
+
+    @mock.patch("simulator_api.utils.metrics.mark_process_dead")
+    def test_child_exit(self, mark_process_dead):
+        gunicorn_config.child_exit(mock.Mock(), mock.Mock(pid=42))
+        mark_process_dead.assert_called_once_with(42)
@@ -1,6 +1,9 @@
+import io
+import socket
+import time
 import unittest
 from simulator_api.entrypoint import app
-from simulator_api.rest_server.exposed_methods import request
+from simulator_api.rest_server.exposed_methods import read_lines, request, warm_up
 from unittest import mock
 
 
@@ -77,3 +80,149 @@ class TestRoutes(unittest.TestCase):
             client.put('/api/dummy-command')
             expected_args = ('dummy-command', request)
             mock_handler_put.assert_called_once_with(*expected_args)
+
+    @mock.patch('simulator_api.rest_server.exposed_methods.TopicEcho')
+    def test_route_stream_call(
+        self, mock_topic_echo, mock_hello, mock_handler_put, mock_handler_post, mock_handler_get
+    ):
+        mock_topic_echo.return_value.stream_execute_v1.return_value = iter(["event: end\n\n"])
+        with app.test_client() as client:
+            response = client.get('/api/v1/topic-echo/stream?topic=/dummy')
+            mock_topic_echo.return_value.stream_execute_v1.assert_called_once_with(
+                {'topic': '/dummy'}
+            )
+            self.assertEqual(response.mimetype, 'text/event-stream')
+            self.assertEqual(response.data.decode('utf-8'), "event: end\n\n")
+            mock_handler_get.assert_not_called()
+
+    @mock.patch('simulator_api.rest_server.exposed_methods.TopicPublishBulk')
+    def test_route_stream_publish_call(
+        self, mock_topic_publish, mock_hello, mock_handler_put, mock_handler_post, mock_handler_get
+    ):
+        mock_topic_publish.return_value.stream_execute_v1.return_value = iter(['{"index": 0}\n'])
+        with app.test_client() as client:
+            response = client.post(
+                '/api/v1/topic-publish-bulk/stream?topic=/dummy&msgtype=dummy', data='"data:1"\n'
+            )
+            mock_topic_publish.return_value.stream_execute_v1.assert_called_once()
+            self.assertEqual(response.mimetype, 'application/x-ndjson')
+            self.assertEqual(response.data.decode('utf-8'), '{"index": 0}\n')
+            mock_handler_post.assert_not_called()
+
+    def test_route_get_status_call_etag(
+        self, mock_hello, mock_handler_put, mock_handler_post, mock_handler_get
+    ):
+        mock_handler_get.return_value = {'status': 'RUNNING'}
+        with app.test_client() as client:
+            response = client.get('/api/v1/dummy-command/1')
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers['ETag']
+
+            response = client.get('/api/v1/dummy-command/1', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+
+            mock_handler_get.return_value = {'status': 'SUCCESS'}
+            response = client.get('/api/dummy-command/1', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_route_metrics(self, mock_hello, mock_handler_put, mock_handler_post, mock_handler_get):
+        mock_handler_get.return_value = {'status': 'SUCCESS'}
+        with app.test_client() as client:
+            client.get('/api/v1/dummy-command/1')
+            response = client.get('/metrics')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.mimetype.startswith('text/plain'))
+            self.assertIn(
+                'simulator_api_request_duration_seconds_count{command="unknown",method="GET"}',
+                response.data.decode('utf-8'),
+            )
+
+    @mock.patch('simulator_api.rest_server.exposed_methods.warmed_up')
+    @mock.patch('simulator_api.rest_server.exposed_methods.get_listener')
+    def test_route_ready(
+        self,
+        mock_get_listener,
+        mock_warmed_up,
+        mock_hello,
+        mock_handler_put,
+        mock_handler_post,
+        mock_handler_get,
+    ):
+        with app.test_client() as client:
+            mock_warmed_up.is_set.return_value = False
+            response = client.get('/ready')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json, {'status': 'warming up'})
+
+            mock_warmed_up.is_set.return_value = True
+            mock_get_listener.return_value.ready.is_set.return_value = False
+            response = client.get('/ready')
+            self.assertEqual(response.status_code, 503)
+
+            mock_get_listener.return_value.ready.is_set.return_value = True
+            response = client.get('/ready')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json, {'status': 'ready'})
+            mock_handler_get.assert_not_called()
+
+    @mock.patch('simulator_api.rest_server.exposed_methods.health_report')
+    @mock.patch('simulator_api.rest_server.exposed_methods.get_listener')
+    def test_route_health(
+        self,
+        mock_get_listener,
+        mock_health_report,
+        mock_hello,
+        mock_handler_put,
+        mock_handler_post,
+        mock_handler_get,
+    ):
+        with app.test_client() as client:
+            mock_health_report.return_value = {'status': "unhealthy", 'broker': "disconnected"}
+            response = client.get('/health')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json['broker'], "disconnected")
+
+            mock_health_report.return_value = {'status': "healthy", 'broker': "connected"}
+            response = client.get('/health')
+            self.assertEqual(response.status_code, 200)
+            mock_health_report.assert_called_with(mock_get_listener.return_value)
+            mock_handler_get.assert_not_called()
+
+
+class TestWarmUp(unittest.TestCase):
+    @mock.patch('simulator_api.rest_server.exposed_methods.warmed_up')
+    @mock.patch('simulator_api.rest_server.exposed_methods.open_connections')
+    def test_warm_up(self, mock_open_connections, mock_warmed_up):
+        mock_open_connections.return_value = True
+        self.assertTrue(warm_up(timeout=1))
+        mock_open_connections.assert_called_once_with(1)
+        mock_warmed_up.set.assert_called_once()
+
+    @mock.patch('simulator_api.rest_server.exposed_methods.warmed_up')
+    @mock.patch('simulator_api.rest_server.exposed_methods.open_connections')
+    def test_warm_up_broker_down(self, mock_open_connections, mock_warmed_up):
+        mock_open_connections.side_effect = OSError("Connection refused")
+        # The process still serves requests, connecting on demand
+        self.assertFalse(warm_up(timeout=1))
+        mock_warmed_up.set.assert_called_once()
+
+
+class TestReadLines(unittest.TestCase):
+    def test_read_lines(self):
+        self.assertEqual(list(read_lines(io.BytesIO(b'"a"\n"b"\n'), None, 5)), [b'"a"\n', b'"b"\n'])
+
+    def test_body_held_open(self):
+        server, client = socket.socketpair()
+        self.addCleanup(server.close)
+        self.addCleanup(client.close)
+        client.sendall(b'"a"\n')
+
+        start = time.monotonic()
+        lines = list(read_lines(server.makefile("rb"), server, 0.2))
+        # The client did not send the rest of its body within the maximum duration
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(lines, [b'"a"\n'])
+        self.assertIsNone(server.gettimeout())
+        self.assertEqual(server.recv(1), b"")
@@ -1,9 +1,14 @@
 import unittest
 from unittest import mock
 from simulator_api.entrypoint import app
+from simulator_api.celery_tasks.result_cache import get_result_cache
 
 
 class TestStatus(unittest.TestCase):
+    def setUp(self):
+        # Results of complete tasks are cached by id in the process
+        get_result_cache().clear()
+
     # Bad_url should return 400
     def test_status_get_call_bad_url(self):
         with app.test_client() as client:
@@ -15,7 +20,15 @@ class TestStatus(unittest.TestCase):
         with app.test_client() as client:
             response = client.get('/api/v1/communication-test')
             self.assertEqual(response.status_code, 200)
-            self.assertIn("Celery tasks:", response.data.decode('utf-8'))
+            self.assertIn("tasks", response.json)
+            self.assertIn("next_cursor", response.json)
+
+    # Comm test get with a bad listing limit should return 400 Bad Request
+    def test_status_get_call_comm_test_bad_limit(self):
+        with app.test_client() as client:
+            response = client.get('/api/v1/communication-test?limit=a')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Not valid limit", response.data.decode('utf-8'))
 
     # Comm test get wit bad id task should return 404 Not Found
     @mock.patch('simulator_api.commands.communication_test.communication_test.AsyncResult')
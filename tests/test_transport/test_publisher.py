@@ -0,0 +1,95 @@
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from simulator_api.transport import publisher
+
+FAKE_IGN = """#!/bin/bash
+echo "$@" >> {log}
+"""
+
+
+class TestPublisher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp_dir.name, "publishes.log")
+        path = os.path.join(self.tmp_dir.name, "ign")
+        with open(path, "w") as fh:
+            fh.write(FAKE_IGN.format(log=self.log))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+        env = {"PATH": f"{self.tmp_dir.name}:{os.environ['PATH']}"}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def published(self):
+        with open(self.log) as fh:
+            return fh.read().splitlines()
+
+    def test_publish(self):
+        result = publisher.publish("/dummy", 'data:\\"test\\"', "ignition.msgs.StringMsg")
+        self.assertEqual(result['status'], "SUCCESS")
+        self.assertEqual(
+            self.published(), ['topic -p data:"test" -t /dummy --msgtype ignition.msgs.StringMsg']
+        )
+
+    def test_publish_burst(self):
+        result = publisher.publish("/dummy", "data:1", "ignition.msgs.Int32", count=3, interval=0)
+        self.assertEqual(result['status'], "SUCCESS")
+        self.assertEqual(
+            result['command'], 'ign topic -p "data:1" -t /dummy --msgtype ignition.msgs.Int32'
+        )
+        self.assertEqual(len(self.published()), 3)
+
+    def test_publish_stream_rate(self):
+        messages = [f"data:{i}" for i in range(5)]
+
+        start = time.monotonic()
+        acks = list(
+            publisher.publish_stream("/dummy", iter(messages), "ignition.msgs.Int32", rate=20)
+        )
+        # The last message is published 4 / 20 seconds after the first one
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(sorted(ack['index'] for ack in acks), [0, 1, 2, 3, 4])
+        self.assertTrue(all(ack['status'] == "SUCCESS" for ack in acks))
+        self.assertEqual(len(self.published()), 5)
+
+    def test_publish_stream_max_in_flight(self):
+        running, peak = [0], [0]
+
+        def slow_publish(topic, message, msgtype):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            running[0] -= 1
+            return {'command': message, 'status': 'SUCCESS'}
+
+        with mock.patch("simulator_api.transport.publisher.publish", side_effect=slow_publish):
+            acks = list(
+                publisher.publish_stream(
+                    "/dummy", ["data:1"] * 6, "ignition.msgs.Int32", max_in_flight=2
+                )
+            )
+        self.assertEqual(len(acks), 6)
+        self.assertEqual(peak[0], 2)
+        self.assertNotIn('command', acks[0])
+
+    def test_publish_stream_deadline(self):
+        messages = [f"data:{i}" for i in range(100)]
+
+        start = time.monotonic()
+        acks = list(
+            publisher.publish_stream(
+                "/dummy", iter(messages), "ignition.msgs.Int32", rate=10, deadline=start + 0.25
+            )
+        )
+        # Messages scheduled after the deadline are not published, nor waited for
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(sorted(ack['index'] for ack in acks), [0, 1, 2])
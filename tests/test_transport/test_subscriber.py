@@ -0,0 +1,103 @@
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from simulator_api.transport import subscriber
+from simulator_api.transport.subscriber import SubscriberDaemon
+
+FAKE_IGN_PUBLISHING = """#!/bin/bash
+while true; do
+    printf 'data: "hello"\\n\\n'
+    sleep 0.1
+done
+"""
+
+FAKE_IGN_SILENT = """#!/bin/bash
+sleep 60
+"""
+
+FAKE_IGN_FAILING = """#!/bin/bash
+echo "unknown topic" >&2
+exit 3
+"""
+
+
+def make_executable(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "w") as fh:
+        fh.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+class TestSubscriberDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_daemon(self, content):
+        executable = make_executable(self.tmp_dir.name, "ign", content)
+        daemon = SubscriberDaemon(buffer_size=3, executable=executable)
+        self.addCleanup(daemon.stop)
+        return daemon
+
+    def test_echo_success(self):
+        daemon = self.make_daemon(FAKE_IGN_PUBLISHING)
+
+        result = daemon.echo("/dummy", 2)
+        self.assertEqual(result, {'command': 'ign topic -e -n 1 -t /dummy', 'status': 'SUCCESS'})
+
+        # Subscription is kept open and its buffer is bounded
+        sub = daemon.subscription("/dummy")
+        self.assertTrue(sub.alive)
+        self.assertEqual(sub.wait_message(2), 'data: "hello"')
+        self.assertLessEqual(len(sub.messages), 3)
+
+    def test_echo_served_from_buffer(self):
+        daemon = self.make_daemon(FAKE_IGN_PUBLISHING)
+        sub = daemon.subscription("/dummy")
+        sub.wait_message(2)
+
+        # A recent buffered message is served without waiting
+        received = sub.received
+        self.assertEqual(sub.wait_message(0, max_age=10), 'data: "hello"')
+        self.assertEqual(sub.received, received)
+
+    def test_echo_timeout(self):
+        daemon = self.make_daemon(FAKE_IGN_SILENT)
+
+        result = daemon.echo("/dummy", 0.2)
+        self.assertEqual(result['status'], 'TIMEOUT')
+
+    def test_echo_error(self):
+        daemon = self.make_daemon(FAKE_IGN_FAILING)
+
+        result = daemon.echo("/dummy", 2)
+        self.assertEqual(result['status'], 'ERROR')
+        self.assertEqual(result['exitcode'], 3)
+        self.assertIn("unknown topic", result['output'])
+
+    def test_iter_messages(self):
+        daemon = self.make_daemon(FAKE_IGN_PUBLISHING)
+        sub = daemon.subscription("/dummy")
+
+        messages = list(sub.iter_messages(max_duration=0.55))
+        self.assertGreaterEqual(len(messages), 3)
+        self.assertEqual(set(messages), {'data: "hello"'})
+
+        # Messages received closer than min_interval are dropped
+        messages = list(sub.iter_messages(max_duration=0.55, min_interval=0.25))
+        self.assertLessEqual(len(messages), 3)
+
+    def test_stop_subscriber(self):
+        make_executable(self.tmp_dir.name, "ign", FAKE_IGN_PUBLISHING)
+        with mock.patch.dict(os.environ, {"PATH": f"{self.tmp_dir.name}:{os.environ['PATH']}"}):
+            sub = subscriber.get_subscriber().subscription("/dummy")
+        self.assertTrue(sub.alive)
+
+        subscriber.stop_subscriber()
+        self.assertFalse(sub.alive)
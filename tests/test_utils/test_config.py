@@ -0,0 +1,115 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from simulator_api.utils.config import ConfigWatcher, load_config
+
+CONFIG = """[communication]
+topic_to_echo = /echo
+topic_to_publish = /publish
+ignition_base_topics = ["/clock","/stats"]
+world_name = empty
+timeout = {timeout}
+max_timeout=15
+"""
+
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "config.ini")
+        self.write_config(timeout=5)
+        for module in ("simulator_api.utils.utils", "simulator_api.utils.config"):
+            patcher = mock.patch(f"{module}.config_path", return_value=self.path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_config(self, timeout):
+        with open(self.path, "w") as fh:
+            fh.write(CONFIG.format(timeout=timeout))
+
+    def test_load_config(self):
+        config = load_config()
+        self.assertEqual(config.communication.timeout, 5)
+        self.assertEqual(config.communication.ignition_base_topics, ("/clock", "/stats"))
+        # Variables missing from the file take their default value
+        self.assertEqual(config.transport.echo_backend, "subscriber")
+
+    @mock.patch.dict(os.environ, {"SIMULATOR_API_TRANSPORT_ECHO_BACKEND": "cli"})
+    def test_environment_override(self):
+        self.assertEqual(load_config().transport.echo_backend, "cli")
+
+    @mock.patch.dict(
+        os.environ,
+        {
+            "SIMULATOR_API_CELERY_BROKER_URL": "filesystem://",
+            "SIMULATOR_API_CELERY_BROKER_OPTIONS": '{"data_folder_in": "/tmp/broker"}',
+        },
+    )
+    def test_celery_override(self):
+        config = load_config()
+        self.assertEqual(config.celery.broker_url, "filesystem://")
+        self.assertEqual(config.celery.broker_options, {'data_folder_in': "/tmp/broker"})
+
+    @mock.patch.dict(os.environ, {"SIMULATOR_API_CELERY_BROKER_OPTIONS": '["a"]'})
+    def test_not_valid_broker_options(self):
+        with self.assertRaises(ValueError):
+            load_config()
+
+    @mock.patch.dict(os.environ, {"SIMULATOR_API_SERVER_WORKER_CLASS": "eventlet"})
+    def test_not_valid_worker_class(self):
+        with self.assertRaises(ValueError):
+            load_config()
+
+    @mock.patch.dict(os.environ, {"SIMULATOR_API_COMMUNICATION_TIMEOUT": "a"})
+    def test_not_valid_value(self):
+        with self.assertRaises(ValueError):
+            load_config()
+
+    def test_not_valid_timeout(self):
+        self.write_config(timeout=40)
+        with self.assertRaises(ValueError):
+            load_config()
+
+    def test_reload_on_modification(self):
+        watcher = ConfigWatcher(interval=0.05)
+        self.assertEqual(watcher.config.communication.timeout, 5)
+
+        self.write_config(timeout=7)
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        time.sleep(0.3)
+        self.assertEqual(watcher.config.communication.timeout, 7)
+
+        # A not valid modification keeps the previous configuration
+        self.write_config(timeout=40)
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+        time.sleep(0.3)
+        self.assertEqual(watcher.config.communication.timeout, 7)
+
+    def test_not_valid_file(self):
+        for content in ("topic_to_echo = /echo\n", "[transport]\nbuffer_size = 1\n"):
+            with open(self.path, "w") as fh:
+                fh.write(content)
+            with self.assertRaises(ValueError):
+                load_config()
+
+    def test_reload_after_not_valid_file(self):
+        watcher = ConfigWatcher(interval=0.05)
+
+        # A half written file is not applied and does not stop the watcher
+        with open(self.path, "w") as fh:
+            fh.write("[communication")
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        time.sleep(0.3)
+        self.assertEqual(watcher.config.communication.timeout, 5)
+        self.assertTrue(watcher._thread.is_alive())
+
+        self.write_config(timeout=7)
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+        time.sleep(0.3)
+        self.assertEqual(watcher.config.communication.timeout, 7)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from simulator_api.utils.executor import execute
+from simulator_api.utils.utils import container_exec_cmd, last_subprocess
+
+
+def process_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            # Killed processes may linger as zombies until reaped
+            return fh.read().split()[2] not in ("Z", "X")
+    except FileNotFoundError:
+        return False
+
+
+class TestExecutor(unittest.TestCase):
+    def test_execute_success(self):
+        result = execute("echo out; echo err >&2")
+        self.assertFalse(result.timeout_flag)
+        self.assertEqual(result.exitcode, 0)
+        self.assertEqual(result.output, b"out\n")
+
+    def test_execute_error(self):
+        result = execute("echo out; echo err >&2; exit 4")
+        self.assertEqual(result.exitcode, 4)
+        self.assertEqual(result.output, b"out\nerr\n")
+
+    def test_execute_output_capped(self):
+        result = execute("head -c 10000 /dev/zero", max_output=100)
+        self.assertEqual(len(result.output), 100)
+        self.assertTrue(result.truncated)
+
+    def test_execute_timeout_kills_process_group(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pid_file = os.path.join(tmp_dir, "pid")
+            result = execute(f"sleep 30 & echo $! > {pid_file}; echo partial; sleep 30", 0.5)
+            with open(pid_file) as fh:
+                pid = int(fh.read())
+
+        self.assertTrue(result.timeout_flag)
+        self.assertEqual(result.output, b"partial\n")
+        self.assertFalse(process_running(pid))
+
+    def test_container_exec_cmd_timeout_output(self):
+        result = container_exec_cmd("echo partial; sleep 30", timeout=0.5)
+        self.assertEqual(
+            result,
+            {'command': "echo partial; sleep 30", 'status': 'TIMEOUT', 'output': "partial\n"},
+        )
+
+    def test_container_exec_cmd_records_subprocess(self):
+        container_exec_cmd("true")
+        success_time = last_subprocess['success_time']
+        self.assertEqual(last_subprocess['status'], 'SUCCESS')
+        self.assertEqual(last_subprocess['time'], success_time)
+
+        container_exec_cmd("false")
+        self.assertEqual(last_subprocess['status'], 'ERROR')
+        self.assertGreaterEqual(last_subprocess['time'], success_time)
+        self.assertEqual(last_subprocess['success_time'], success_time)
@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from prometheus_client import REGISTRY
+
+from simulator_api.utils.config import load_config
+from simulator_api.utils.metrics import command_names, generate_metrics
+from simulator_api.utils.utils import container_exec_cmd
+from simulator_api.celery_tasks.tasks import task_post_run, task_pre_run
+
+RECORD_METRICS = """
+from simulator_api.utils.utils import container_exec_cmd
+container_exec_cmd("true")
+container_exec_cmd("false")
+"""
+
+EXPOSE_METRICS = """
+from simulator_api.utils.metrics import generate_metrics
+print(generate_metrics()[0].decode())
+"""
+
+
+class TestMetrics(unittest.TestCase):
+    def sample(self, name, labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_subprocess_duration(self):
+        labels = {'status': "ERROR"}
+        before = self.sample("simulator_api_subprocess_duration_seconds_count", labels)
+        container_exec_cmd("exit 1")
+        after = self.sample("simulator_api_subprocess_duration_seconds_count", labels)
+        self.assertEqual(after - before, 1)
+
+    @mock.patch('simulator_api.celery_tasks.tasks.notify_completion')
+    @mock.patch('simulator_api.celery_tasks.registry.get_registry')
+    def test_task_metrics(self, mock_get_registry, mock_notify):
+        task = mock.MagicMock()
+        task.name = "simulator_api.celery_tasks.tasks.echo_topic"
+        task.request.published_at = 0
+        task.request.callback_url = None
+
+        task_pre_run(task_id="1", task=task)
+        self.assertEqual(self.sample("simulator_api_tasks_in_flight", {'task': task.name}), 1)
+        task_post_run(task_id="1", task=task, retval={}, state="SUCCESS")
+        self.assertEqual(self.sample("simulator_api_tasks_in_flight", {'task': task.name}), 0)
+
+        labels = {'task': task.name, 'state': "SUCCESS"}
+        self.assertEqual(self.sample("simulator_api_task_run_seconds_count", labels), 1)
+        self.assertEqual(
+            self.sample("simulator_api_task_queue_wait_seconds_count", {'task': task.name}), 1
+        )
+
+    def test_command_names(self):
+        self.assertIn("topic-echo", command_names())
+        self.assertIn("communication-test", command_names())
+
+    def test_multiprocess_metrics(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+            # Metrics recorded by a process are exposed by another one
+            subprocess.run([sys.executable, "-c", RECORD_METRICS], env=env, check=True)
+            metrics = subprocess.run(
+                [sys.executable, "-c", EXPOSE_METRICS],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        self.assertIn(
+            'simulator_api_subprocess_duration_seconds_count{status="SUCCESS"} 1.0', metrics
+        )
+        self.assertIn(
+            'simulator_api_subprocess_duration_seconds_count{status="ERROR"} 1.0', metrics
+        )
+
+    def test_generate_metrics(self):
+        data, content_type = generate_metrics()
+        self.assertIn(b"simulator_api_request_duration_seconds", data)
+        self.assertTrue(content_type.startswith("text/plain"))
+
+    def test_database_size(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry_path = os.path.join(tmp_dir, "celery_tasks.sqlite3")
+            with open(registry_path, "wb") as fh:
+                fh.write(b"\0" * 4096)
+            with mock.patch.dict(os.environ, {"SIMULATOR_API_CELERY_REGISTRY_PATH": registry_path}):
+                # Configuration read with the overridden path
+                with mock.patch(
+                    "simulator_api.celery_tasks.retention.get_config", side_effect=load_config
+                ):
+                    data, _ = generate_metrics()
+        self.assertIn(b'simulator_api_database_size_bytes{database="registry"} 4096.0', data)
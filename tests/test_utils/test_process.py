@@ -0,0 +1,49 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+from simulator_api.utils.process import per_process
+
+
+class TestPerProcess(unittest.TestCase):
+    def test_created_once(self):
+        factory = mock.MagicMock(side_effect=lambda size: object())
+        instance = per_process(factory)
+
+        self.assertIsNone(instance.current())
+        first = instance(1)
+        # The arguments of the next calls are ignored
+        self.assertIs(instance(2), first)
+        self.assertIs(instance.current(), first)
+        factory.assert_called_once_with(1)
+
+    def test_created_once_by_concurrent_calls(self):
+        factory = mock.MagicMock(side_effect=lambda: object())
+        instance = per_process(factory)
+
+        threads = [threading.Thread(target=instance) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        factory.assert_called_once_with()
+
+    def test_created_again_in_child(self):
+        instance = per_process(lambda: os.getpid())
+        self.assertEqual(instance(), os.getpid())
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            # Exit without running the cleanup of the test process
+            os.write(write_fd, f"{instance.current()},{instance()}".encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as fh:
+            result = fh.read()
+        os.waitpid(pid, 0)
+
+        self.assertEqual(result, f"None,{pid}")
+        self.assertEqual(instance(), os.getpid())
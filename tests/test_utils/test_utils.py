@@ -0,0 +1,90 @@
+import time
+import unittest
+
+from werkzeug.exceptions import BadRequest
+
+from simulator_api.utils.utils import parse_wait, run_checks
+
+
+def sleeping_check(command, duration):
+    def check():
+        time.sleep(duration)
+        return {'command': command, 'status': 'SUCCESS'}
+
+    return (command, check)
+
+
+class TestRunChecks(unittest.TestCase):
+    def test_sequential_checks(self):
+        progress = []
+        checks = [sleeping_check("a", 0), sleeping_check("b", 0)]
+
+        checklist = run_checks(checks, on_progress=progress.append, concurrent=False)
+        self.assertEqual([check['command'] for check in checklist], ["a", "b"])
+        self.assertEqual([len(report) for report in progress], [1, 2])
+
+    def test_concurrent_checks_keep_order(self):
+        progress = []
+        checks = [sleeping_check("a", 0.3), sleeping_check("b", 0.1), sleeping_check("c", 0.2)]
+
+        start = time.monotonic()
+        checklist = run_checks(checks, on_progress=progress.append, concurrent=True)
+        # Checks overlap, total duration is close to the slowest check
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual([check['command'] for check in checklist], ["a", "b", "c"])
+        # Progress is reported in the order of the checks as they complete
+        self.assertEqual(
+            [[check['command'] for check in report] for report in progress],
+            [["b"], ["b", "c"], ["a", "b", "c"]],
+        )
+
+    def test_concurrent_checks_global_timeout(self):
+        checks = [sleeping_check("a", 1), sleeping_check("b", 0)]
+
+        checklist = run_checks(checks, concurrent=True, global_timeout=0.2)
+        self.assertEqual(
+            checklist,
+            [{'command': "a", 'status': 'TIMEOUT'}, {'command': "b", 'status': 'SUCCESS'}],
+        )
+
+    def test_concurrent_checks_max_workers(self):
+        checks = [sleeping_check(str(i), 0.2) for i in range(4)]
+
+        start = time.monotonic()
+        checklist = run_checks(checks, concurrent=True, max_workers=2)
+        # Two batches of two checks
+        self.assertGreaterEqual(time.monotonic() - start, 0.4)
+        self.assertEqual(len(checklist), 4)
+
+    def test_failing_check_reported(self):
+        def failing_check():
+            raise OSError("No such file or directory: 'ign'")
+
+        for concurrent in (False, True):
+            checklist = run_checks(
+                [sleeping_check("a", 0.1), ("b", failing_check), sleeping_check("c", 0)],
+                concurrent=concurrent,
+            )
+            # The other checks are still reported, in order
+            self.assertEqual(
+                checklist,
+                [
+                    {'command': "a", 'status': 'SUCCESS'},
+                    {
+                        'command': "b",
+                        'status': 'ERROR',
+                        'output': "No such file or directory: 'ign'",
+                    },
+                    {'command': "c", 'status': 'SUCCESS'},
+                ],
+            )
+
+
+class TestParseWait(unittest.TestCase):
+    def test_parse_wait(self):
+        self.assertEqual(parse_wait(None, 25), 0)
+        self.assertEqual(parse_wait({"wait": ""}, 25), 0)
+        self.assertEqual(parse_wait({"wait": "2.5"}, 25), 2.5)
+        for bad_wait in ["a", "-1", "30"]:
+            with self.assertRaises(BadRequest):
+                parse_wait({"wait": bad_wait}, 25)